@@ -1,8 +1,15 @@
-from flask import Flask, redirect, url_for, session, request, render_template
+from flask import Flask, redirect, url_for, session, request, render_template, jsonify, Response, stream_with_context
 from authlib.integrations.flask_client import OAuth
 import os, json
 from pathlib import Path
-from log_performance import log_question_performance
+from log_performance import log_session_performance
+from question_store import get_question_store
+from study_session_store import get_session_store, new_session_id
+from study_sampler import STUDY_SET_SIZE, get_study_sampler, recent_question_ids
+from user_log_index import get_answered_index, get_user_rollups
+from srs_scheduler import get_srs_scheduler
+from practice_feedback import PROMPT_STEPS, feedback_messages, get_ai_feedback
+from llm_client import stream_chat_completion
 import time
 
 
@@ -52,9 +59,8 @@ def dashboard():
         {"id": "cars", "name": "CARS", "progress": "82%"},
         {"id": "bio", "name": "Biology", "progress": "41%"}
     ]
-    log_path = USER_DIR / user_id / "user_logs.jsonl"
-    passage_file = "training-data/passages.jsonl"
-    topic_perf, style_perf = compute_topic_style_performance(log_path, passage_file)
+    rollups = get_user_rollups(USER_DIR / user_id)
+    topic_perf, style_perf = rollups.topic, rollups.style
 
     return render_template("dashboard.html", user=user, profile=profile, subjects=subjects,topic_perf=topic_perf, style_perf=style_perf)
 
@@ -67,22 +73,16 @@ def review_passage(passage_id):
 
     user_id = user["sub"]
     log_path = USER_DIR / user_id / "user_logs.jsonl"
-    question_file = Path("training-data/questions.jsonl")
+    corpus = get_question_store()
 
-    if not log_path.exists() or not question_file.exists():
+    if not log_path.exists() or not corpus.has_data():
         return "No data available."
 
-    with open(log_path, "r") as f:
-        logs = [json.loads(line.strip()) for line in f]
-
-    with open(question_file, "r") as f:
-        all_questions = [json.loads(line.strip()) for line in f]
-
     # Filter for this passage
+    answered = get_answered_index(USER_DIR / user_id).answered_for_passage(passage_id)
     reviewed = [
-        q for q in all_questions
-        if q["passage_id"] == passage_id
-        and any(log["question_id"] == q["question_id"] for log in logs)
+        q for q in corpus.get_questions_for_passage(passage_id)
+        if q["question_id"] in answered
     ]
 
     return render_template("review_passage.html", passage_id=passage_id, questions=reviewed)
@@ -97,43 +97,68 @@ def start_studying():
 
     user_id = user["sub"]
     profile_path = USER_DIR / user_id / "user_profile.json"
-    question_file = Path("training-data/questions.jsonl")
-    passage_file = Path("training-data/passages.jsonl")
+    corpus = get_question_store()
 
-    if not profile_path.exists() or not question_file.exists() or not passage_file.exists():
+    if not profile_path.exists() or not corpus.has_data():
         return "Missing required data files."
 
     with open(profile_path) as f:
         profile = json.load(f)
-    with open(question_file) as f:
-        all_questions = [json.loads(line.strip()) for line in f]
-    with open(passage_file) as f:
-        all_passages = {json.loads(line)["passage_id"]: json.loads(line) for line in f}
 
-    weak = sorted(profile["question_stats"].items(), key=lambda x: x[1]["correct"] / max(x[1]["attempts"], 1))[:2]
-    weak_types = [w[0] for w in weak]
-    if not weak_types:
-        weak_types = ["main idea", "inference"]  # safe default
+    sampler = get_study_sampler(corpus)
+    if session.get("selection_mode") == "spaced":
+        # Questions due for review first, most overdue first; the rest of the
+        # set is new questions (anything already scheduled waits until it's due,
+        # so the set can come up short)
+        scheduler = get_srs_scheduler(USER_DIR / user_id)
+        question_ids = scheduler.due(STUDY_SET_SIZE, keep=sampler.has_question)
+        question_ids += sampler.sample(profile, STUDY_SET_SIZE - len(question_ids), exclude=scheduler.cards,
+                                       taken=question_ids, strict_exclude=True)
+        if not question_ids:
+            return "Nothing is due for review and there are no new questions left. Check back later."
+    else:
+        # Weighted toward weak types and difficulties; skips what was just answered
+        # and the previous set, so repeat visits don't serve the same questions
+        recent = recent_question_ids(profile) + session.get("study_question_ids", [])
+        question_ids = sampler.sample(profile, STUDY_SET_SIZE, exclude=recent)
+
+    # Question payloads stay server-side; the cookie only carries ids
+    study_id = new_session_id()
+    get_session_store().save(study_id, {
+        "question_ids": question_ids,
+        "answers": [],
+        "answers_meta": [],
+    })
+    session["study_session_id"] = study_id
+    session["study_question_ids"] = question_ids
+    for stale_key in ("study_questions", "study_index", "study_answers", "study_answers_meta", "time_started"):
+        session.pop(stale_key, None)
+
+    print("Questions loaded into session:", len(question_ids))
 
-    questions = []
-    for q in all_questions:
-        if q["question_type"] in weak_types:
-            passage = all_passages.get(q["passage_id"])
-            if passage:
-                para_idx = q.get("linked_paragraph", 1) - 1
-                q["full_passage"] = passage["paragraphs"]  # keep as list for review
-                q["passage_title"] = passage["title"]
-                q["passage_source"] = passage["journal"]
-                questions.append(q)
-
-    session["study_questions"] = questions[:5]
-    session["study_index"] = 0
-    session["study_answers"] = []
-    mode = session.get("feedback_mode", "immediate")
+    return redirect(url_for("study_question", index=0))
 
-    print("Questions loaded into session:", len(questions[:5]))
 
-    return redirect(url_for("study_question", index=0))
+## Study session helpers
+def load_study_state():
+    return get_session_store().get(session.get("study_session_id"))
+
+def save_study_state(state):
+    get_session_store().save(session["study_session_id"], state)
+
+def load_study_questions(question_ids):
+    corpus = get_question_store()
+    questions = []
+    for qid in question_ids:
+        q = corpus.get_question(qid)
+        passage = corpus.get_passage(q["passage_id"]) if q else None
+        if not passage:
+            continue
+        q["full_passage"] = passage["paragraphs"]  # keep as list for review
+        q["passage_title"] = passage["title"]
+        q["passage_source"] = passage["journal"]
+        questions.append(q)
+    return questions
 
 
 ## STUDY START
@@ -142,6 +167,7 @@ def study_start():
     if request.method == "POST":
         mode = request.form.get("mode")
         session["feedback_mode"] = mode
+        session["selection_mode"] = request.form.get("selection", "weak")
         return redirect(url_for("start_studying"))
     return render_template("study_mode_select.html")
 
@@ -150,12 +176,19 @@ def study_start():
 # Final Review Route 
 @app.route("/study/review")
 def study_review():
-    from log_performance import log_question_performance
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+
+    state = load_study_state()
+    if state is None:
+        return redirect(url_for("study_start"))
 
-    questions = session.get("study_questions", [])
-    answers = session.get("study_answers", [])
-    meta = session.get("study_answers_meta", [])
+    questions = load_study_questions(session.get("study_question_ids", []))
+    answers = state["answers"]
+    meta = state["answers_meta"]
     results = []
+    performance = []
 
     for i, q in enumerate(questions):
         selected = answers[i] if i < len(answers) else None
@@ -174,45 +207,64 @@ def study_review():
             "time_taken": info.get("time_taken", "-"),
             "confidence": info.get("confidence", "-")
         })
+        performance.append({
+            "question_id": q["question_id"],
+            "question_type": q["question_type"],
+            "difficulty": q.get("difficulty_rating", 5),
+            "was_correct": is_correct
+        })
 
-        log_question_performance(
-            question_id=q["question_id"],
-            question_type=q["question_type"],
-            difficulty=q.get("difficulty_rating", 5),
-            was_correct=is_correct
-        )
+    # One profile write per study set; refreshing this page doesn't log it again
+    log_session_performance(
+        performance,
+        session_id=session["study_session_id"],
+        user_dir=USER_DIR / user["sub"]
+    )
 
     return render_template("study_review.html", results=results)
 
 ## APP REVIEW CONFIDENCE
 @app.route("/review/confidence/<int:index>", methods=["POST"])
 def update_confidence(index):
+    state = load_study_state()
+    if state is None:
+        return redirect(url_for("study_start"))
+
     confidence = request.form.get("confidence")
-    answers_meta = session.get("study_answers_meta", [])
+    answers_meta = state["answers_meta"]
     while len(answers_meta) <= index:
         answers_meta.append({})
     answers_meta[index]["confidence"] = confidence
-    session["study_answers_meta"] = answers_meta
+    save_study_state(state)
     return redirect(url_for("study_review"))
 
 
 ## Study Question timing 
 @app.route("/study/question/<int:index>", methods=["GET", "POST"])
 def study_question(index):
-    questions = session.get("study_questions", [])
-    answers = session.get("study_answers", [])
-    answers_meta = session.get("study_answers_meta", [])
+    state = load_study_state()
+    if state is None:
+        return redirect(url_for("study_start"))
+
+    question_ids = session.get("study_question_ids", [])
+    answers = state["answers"]
+    answers_meta = state["answers_meta"]
     mode = session.get("feedback_mode", "immediate")
 
-    if index >= len(questions):
+    if index >= len(question_ids):
+        return redirect(url_for("study_review"))
+
+    loaded = load_study_questions([question_ids[index]])
+    if not loaded:
         return redirect(url_for("study_review"))
+    question = loaded[0]
 
     if request.method == "POST":
         selected = request.form.get("answer")
         answers.append(selected)
 
         # Calculate time taken
-        start_time = session.pop("time_started", time.time())
+        start_time = state.pop("time_started", time.time())
         time_taken = round(time.time() - start_time, 2)
 
         # Save to answer meta
@@ -220,13 +272,12 @@ def study_question(index):
             answers_meta.append({})
         answers_meta[index]["time_taken"] = time_taken
 
-        session["study_answers"] = answers
-        session["study_answers_meta"] = answers_meta
+        save_study_state(state)
 
         if mode == "immediate":
             return render_template(
                 "study_session.html",
-                question=questions[index],
+                question=question,
                 selected=selected,
                 index=index,
                 mode=mode,
@@ -236,51 +287,43 @@ def study_question(index):
         return redirect(url_for("study_question", index=index + 1))
 
     # GET method: store start time for timing
-    session["time_started"] = time.time()
+    state["time_started"] = time.time()
+    save_study_state(state)
 
     return render_template(
         "study_session.html",
-        question=questions[index],
+        question=question,
         selected=None,
         index=index,
         mode=mode
     )
 
-## HELPER TO COMPUTE ACCURACY By TOPIC and STYLE
-def compute_topic_style_performance(log_path, passage_file):
-    if not os.path.exists(log_path) or not os.path.exists(passage_file):
-        return {}, {}
-
-    with open(log_path, "r") as f:
-        logs = [json.loads(line.strip()) for line in f if line.strip()]
-    with open(passage_file, "r") as f:
-        passages = {json.loads(line)["passage_id"]: json.loads(line) for line in f}
-
-    topic_stats = {}
-    style_stats = {}
-
-    for log in logs:
-        pid = log["question_id"].split("_")[0]
-        passage = passages.get(pid)
-        if not passage:
-            continue
-
-        topic = passage.get("topic", "unknown")
-        style = passage.get("style", "unknown")
 
-        def update_stats(container, key, correct):
-            if key not in container:
-                container[key] = {"seen": 0, "correct": 0}
-            container[key]["seen"] += 1
-            if correct:
-                container[key]["correct"] += 1
+# Tutor feedback on one drill answer. ?stream=1 returns the text as it's generated
+# (text/plain, chunked) so the page can show it right away; otherwise JSON.
+@app.route("/practice/feedback", methods=["POST"])
+def practice_feedback():
+    if not session.get("user"):
+        return jsonify({"error": "login required"}), 401
 
-        update_stats(topic_stats, topic, log["was_correct"])
-        update_stats(style_stats, style, log["was_correct"])
+    data = request.get_json(silent=True) or request.form
+    sentence = data.get("sentence", "")
+    prompt_type = data.get("prompt_type")
+    user_response = data.get("response", "")
+    if not sentence or prompt_type not in dict(PROMPT_STEPS):
+        return jsonify({"error": "sentence and a valid prompt_type are required"}), 400
 
-    return topic_stats, style_stats
+    if request.args.get("stream") not in ("1", "true"):
+        return jsonify({"prompt_type": prompt_type, "feedback": get_ai_feedback(sentence, prompt_type, user_response)})
 
+    def generate():
+        try:
+            yield from stream_chat_completion(feedback_messages(sentence, prompt_type, user_response), temperature=0.5)
+        except Exception as e:
+            yield f"\n⚠️ Error retrieving feedback: {e}"
 
+    return Response(stream_with_context(generate()), mimetype="text/plain",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route("/subject/<subject_id>")
@@ -1,36 +1,18 @@
 import json
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import chat_completion
+from passage_chunker import chunk_paragraphs
 
 # Paths
 input_path = os.path.join("data", "articles.json")
 output_path = os.path.join("data", "refined_passages.json")
+REFINE_TARGET_TOKENS = 750  # ~550 words; the refiner reframes each chunk to 400–600 words
+REFINE_OVERLAP_TOKENS = 100
 
 # Load articles
 with open(input_path, "r", encoding="utf-8") as f:
     articles = json.load(f)
 
-# Split into 400–600 word chunks
-def chunk_paragraphs(paragraphs, min_words=400, max_words=600):
-    chunks, current_chunk, count = [], [], 0
-    for para in paragraphs:
-        wc = len(para["text"].split())
-        if count + wc <= max_words:
-            current_chunk.append(para["text"])
-            count += wc
-        else:
-            if count >= min_words:
-                chunks.append(" ".join(current_chunk))
-            current_chunk = [para["text"]]
-            count = wc
-    if current_chunk and count >= min_words:
-        chunks.append(" ".join(current_chunk))
-    return chunks
-
 # GPT prompt to reframe and annotate
 def refine_passage(raw_text):
     prompt = f"""
@@ -46,17 +28,18 @@ ANNOTATIONS:
 Paragraph 1: <purpose>
 Paragraph 2: <purpose>
 ...
+
+Text:
+<raw>
 """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        return chat_completion(
             messages=[
                 {"role": "system", "content": "You are a high-level academic editor with expertise in exam prep."},
                 {"role": "user", "content": prompt.replace("<raw>", raw_text)}
             ],
             temperature=0.7
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"⚠️ GPT error: {e}"
 
@@ -65,14 +48,16 @@ refined = []
 
 for article in articles:
     paragraphs = article.get("paragraphs", [])
-    chunks = chunk_paragraphs(paragraphs)
+    chunks = chunk_paragraphs(paragraphs, target_tokens=REFINE_TARGET_TOKENS, overlap_tokens=REFINE_OVERLAP_TOKENS)
 
     for chunk in chunks:
-        refined_output = refine_passage(chunk)
+        refined_output = refine_passage(chunk["text"])
         refined.append({
             "title": article.get("title"),
             "source": article.get("url"),
-            "raw_chunk": chunk,
+            "raw_chunk": chunk["text"],
+            "paragraph_indices": chunk["paragraph_indices"],
+            "token_count": chunk["token_count"],
             "refined_passage": refined_output
         })
 
@@ -1,13 +1,12 @@
 import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import argparse
+from llm_client import chat_completion
+from worker_pool import map_in_order
 
 RAW_FOLDER = "raw-passages"
 OUTPUT_FILE = "training-data/passages.jsonl"
+MAX_IN_FLIGHT = int(os.getenv("ANNOTATE_WORKERS", 4))
 os.makedirs("training-data", exist_ok=True)
 
 # GPT function to annotate passage text
@@ -35,37 +34,39 @@ Return JSON like:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        content = chat_completion(
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.5
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         print("⚠️ GPT error:", e)
         return None
 
+# Load a raw passage file, then annotate it (runs on a worker thread)
+def annotate_file(filename):
+    filepath = os.path.join(RAW_FOLDER, filename)
+    print(f"🔍 Trying to load: {filepath}")
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        passage_data = json.load(f)
+
+    print(f"⏳ Processing {filename}...")
+    return passage_data, gpt_annotate_passage(passage_data["text"])
+
 # Batch processing loop
-def main():
-    print("📚 Starting batch processing of passages...\n")
+def main(max_in_flight=MAX_IN_FLIGHT):
+    print(f"📚 Starting batch processing of passages ({max_in_flight} in flight)...\n")
 
     files = [f for f in os.listdir(RAW_FOLDER) if f.endswith(".json")]
     processed = 0
 
     with open(OUTPUT_FILE, "a", encoding="utf-8") as output_file:
-        for filename in files:
-            filepath = os.path.join(RAW_FOLDER, filename)
-            print(f"🔍 Trying to load: {filepath}")
-
-            with open(filepath, "r", encoding="utf-8") as f:
-                passage_data = json.load(f)
-
-            print(f"⏳ Processing {filename}...")
-
-            gpt_result = gpt_annotate_passage(passage_data["text"])
+        # Requests overlap, but results are written in file order
+        for filename, (passage_data, gpt_result) in map_in_order(annotate_file, files, max_workers=max_in_flight):
             if not gpt_result:
                 print(f"❌ Failed to process {filename}\n")
                 continue
@@ -84,10 +85,14 @@ def main():
             }
 
             output_file.write(json.dumps(final_data) + "\n")
+            output_file.flush()
             print(f"✅ Saved: {final_data['passage_id']} — difficulty {final_data['estimated_difficulty']}\n")
             processed += 1
 
     print(f"\n🎉 Finished! {processed} passage(s) processed and saved to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Annotate raw-passages/*.json with GPT")
+    parser.add_argument("--workers", type=int, default=MAX_IN_FLIGHT, help="max concurrent GPT requests")
+    args = parser.parse_args()
+    main(max_in_flight=args.workers)
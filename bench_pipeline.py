@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from fake_llm_server import FakeLLMServer
+
+REPO_DIR = Path(__file__).resolve().parent
+STAGES = ["ingest", "annotate", "generate", "classify"]
+
+WORDS = (
+    "argument evidence however culture scholars suggest history claim although society "
+    "theory interpretation critics nevertheless author contends tradition because moral "
+    "therefore ambiguity reader perhaps modern assumption indeed political narrative"
+).split()
+
+
+# Synthetic raw passages: .txt + raw-metadata.json for the converter, .json for ingest
+def seed_workdir(workdir, n_passages, paragraphs_per_passage, seed):
+    rng = random.Random(seed)
+    raw_dir = workdir / "raw-passages"
+    raw_dir.mkdir(parents=True)
+    (workdir / "training-data").mkdir()
+
+    metadata = []
+    for i in range(1, n_passages + 1):
+        pid = f"b{i:04}"
+        paragraphs = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 120))).capitalize() + "."
+            for _ in range(paragraphs_per_passage)
+        ]
+        text = "\n".join(paragraphs)
+        meta = {"passage_id": pid, "title": f"Benchmark passage {i}", "author": "bench", "journal": "bench"}
+        metadata.append(meta)
+        with open(raw_dir / f"{pid}.txt", "w", encoding="utf-8") as f:
+            f.write(text)
+        with open(raw_dir / f"{pid}.json", "w", encoding="utf-8") as f:
+            json.dump({**meta, "text": text}, f)
+
+    with open(workdir / "raw-metadata.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+
+    shutil.copytree(REPO_DIR / "models", workdir / "models", ignore=shutil.ignore_patterns("embeddings"))
+
+
+# Wrap fn so each call's wall time is appended to latencies
+def timed(fn, latencies):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+# Each stage drives the real module and returns (items processed, per-item latencies)
+def stage_ingest(args):
+    import ingest_passages
+    ingest_passages.RAW_DIRS = ["raw-passages"]
+    ingest_passages.TARGET_FILE = "training-data/ingested.jsonl"
+    ingest_passages.main()
+    return count_lines(ingest_passages.TARGET_FILE), []
+
+
+def stage_annotate(args):
+    import smart_batch_passage_converter as converter
+    latencies = []
+    converter.gpt_annotate_passage = timed(converter.gpt_annotate_passage, latencies)
+    converter.main(max_in_flight=args.workers)
+    return count_lines(converter.OUTPUT_FILE), latencies
+
+
+def stage_generate(args):
+    import generate_questions
+    latencies = []
+    generate_questions.generate_questions_and_tags = timed(generate_questions.generate_questions_and_tags, latencies)
+    generate_questions.main(workers=args.workers)
+    return len(latencies), latencies
+
+
+def stage_classify(args):
+    import predict_question_type
+    with open("training-data/passages.jsonl", "r", encoding="utf-8") as f:
+        passages = {p["passage_id"]: p for p in map(json.loads, f)}
+    with open("training-data/questions.jsonl", "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    latencies = []
+    predict = timed(predict_question_type.predict_question_type, latencies)
+    for q in questions:
+        passage = passages[q["passage_id"]]
+        paragraph = passage["paragraphs"][(q.get("linked_paragraph") or 1) - 1]["text"]
+        predict(passage["title"], paragraph, q["question_text"])
+    return len(questions), latencies
+
+
+STAGE_FUNCS = {
+    "ingest": stage_ingest,
+    "annotate": stage_annotate,
+    "generate": stage_generate,
+    "classify": stage_classify,
+}
+
+
+def run_stage(name, args):
+    output = io.StringIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            items, latencies = STAGE_FUNCS[name](args)
+        error = None
+    except Exception as e:
+        items, latencies, error = 0, [], f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "stage": name,
+        "items": items,
+        "wall_s": wall,
+        "items_per_s": items / wall if wall and items else 0.0,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p90_ms": _ms(percentile(latencies, 90)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "peak_mem_mb": peak / (1024 * 1024),
+        "error": error,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def print_report(results, server_stats):
+    print(f"\n{'stage':<10} {'items':>6} {'wall s':>8} {'items/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    for r in results:
+        cols = [r["p50_ms"], r["p90_ms"], r["p99_ms"]]
+        lat = " ".join(f"{c:>8.1f}" if c is not None else f"{'-':>8}" for c in cols)
+        print(f"{r['stage']:<10} {r['items']:>6} {r['wall_s']:>8.2f} {r['items_per_s']:>8.2f} {lat} {r['peak_mem_mb']:>8.1f}")
+        if r["error"]:
+            print(f"  ❌ {r['error']}")
+    print(f"\n📡 Fake LLM server: {server_stats}")
+
+    try:
+        import resource
+        scale = 1024 if sys.platform != "darwin" else 1024 * 1024
+        print(f"📈 Process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale:.1f} MB")
+    except ImportError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against a local fake LLM server")
+    parser.add_argument("--passages", type=int, default=20, help="synthetic passages to push through the pipeline")
+    parser.add_argument("--paragraphs", type=int, default=5, help="paragraphs per passage")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM requests failing with 429/5xx")
+    parser.add_argument("--workers", type=int, default=4, help="concurrency for stages that support it")
+    parser.add_argument("--backoff", type=float, default=0.05, help="retry backoff base in seconds")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGE_FUNCS]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    json_path = Path(args.json).resolve() if args.json else None
+    workdir = Path(tempfile.mkdtemp(prefix="cars-bench-"))
+    seed_workdir(workdir, args.passages, args.paragraphs, args.seed)
+
+    server = FakeLLMServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["LLM_CACHE_DIR"] = str(workdir / ".llm_cache")
+    os.environ["EMBEDDING_STORE_DIR"] = str(workdir / "models" / "embeddings")
+    if not args.cache:
+        os.environ["LLM_CACHE"] = "off"
+
+    # The pipeline modules use paths relative to the working directory
+    sys.path.insert(0, str(REPO_DIR))
+    old_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import llm_client
+        llm_client.BACKOFF_BASE = args.backoff
+
+        print(f"🏁 Benchmarking {args.passages} passage(s) through {', '.join(stages)} "
+              f"(latency {args.latency}s, error rate {args.error_rate}, {args.workers} workers)")
+        results = []
+        for name in stages:
+            print(f"⏱️  {name}...")
+            results.append(run_stage(name, args))
+    finally:
+        os.chdir(old_cwd)
+        server.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results, server.stats)
+    if args.keep:
+        print(f"📁 Working directory kept at {workdir}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "server": server.stats, "stages": results}, f, indent=2)
+        print(f"💾 Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from llm_client import get_client, with_retries
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+STORE_DIR = Path(os.getenv("EMBEDDING_STORE_DIR", "models/embeddings"))
+BATCH_SIZE = 256  # texts per embeddings request; the endpoint accepts lists
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Persistent embedding cache for one model: a float32 matrix appended to
+# <model>.f32 (read back memory-mapped) plus a JSON index of text hash -> row.
+class EmbeddingStore:
+    def __init__(self, model=EMBEDDING_MODEL, directory=STORE_DIR):
+        self.model = model
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.matrix_path = self.directory / f"{model}.f32"
+        self.keys_path = self.directory / f"{model}.keys.json"
+        self._lock = threading.Lock()
+        self._matrix = None
+        self.dim = None
+        self.rows = {}
+        if self.keys_path.exists():
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.dim = data["dim"]
+            self.rows = data["rows"]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _matrix_view(self):
+        if self._matrix is None and self.rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim))
+        return self._matrix
+
+    def get(self, text):
+        row = self.rows.get(text_key(text))
+        if row is None:
+            return None
+        return np.array(self._matrix_view()[row])
+
+    # Append new vectors and persist the key index; texts already stored are skipped
+    def add(self, texts, vectors):
+        with self._lock:
+            new = {}
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                if key not in self.rows and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+            block = np.asarray(list(new.values()), dtype=np.float32)
+            if self.dim is None:
+                self.dim = block.shape[1]
+            with open(self.matrix_path, "ab") as f:
+                # Drop any rows written by an interrupted add() that never made it into the index
+                f.truncate(len(self.rows) * self.dim * 4)
+                f.write(block.tobytes())
+            for key in new:
+                self.rows[key] = len(self.rows)
+
+            tmp_path = self.keys_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "dim": self.dim, "rows": self.rows}, f)
+            os.replace(tmp_path, self.keys_path)
+            self._matrix = None  # re-map to pick up the new rows
+
+
+# Request embeddings for a list of texts in one call; returns vectors in input order
+def request_embeddings(texts, model=EMBEDDING_MODEL):
+    response = with_retries(lambda: get_client().embeddings.create(model=model, input=texts))
+    return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+
+_stores = {}
+
+
+def get_store(model=EMBEDDING_MODEL):
+    if model not in _stores:
+        _stores[model] = EmbeddingStore(model)
+    return _stores[model]
+
+
+# Embed many texts: cached vectors come from disk, the rest are fetched in
+# batches of BATCH_SIZE and stored. Entries whose batch failed are None.
+def embed_texts(texts, model=EMBEDDING_MODEL, batch_size=BATCH_SIZE):
+    store = get_store(model)
+    results = [store.get(t) for t in texts]
+
+    missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+    if missing:
+        cached = sum(r is not None for r in results)
+        print(f"🔢 Embedding {len(missing)} new text(s) ({cached} cached)...")
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        try:
+            store.add(batch, request_embeddings(batch, model))
+        except Exception as e:
+            print("Embedding error:", e)
+
+    return [r if r is not None else store.get(t) for t, r in zip(texts, results)]
+
+
+# Single-text convenience wrapper; returns a list of floats or None
+def embed_text(text, model=EMBEDDING_MODEL):
+    vector = embed_texts([text], model)[0]
+    return vector.tolist() if vector is not None else None
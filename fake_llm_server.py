@@ -0,0 +1,241 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_DIM = 1536
+
+# Canned chat replies, picked by the first marker found in the request's messages.
+# Each value is a function of the last user message so replies look plausible.
+def _annotation_reply(prompt):
+    text = prompt.split("Text:", 1)[-1].split("Return JSON like:", 1)[0].strip()
+    paragraphs = [p for p in text.split("\n") if p.strip()] or [text]
+    purposes = ["thesis", "support", "counterpoint", "elaboration", "shift", "conclusion"]
+    return json.dumps({
+        "paragraphs": [
+            {"text": p, "rhetorical_purpose": purposes[i % len(purposes)], "tone": "analytical"}
+            for i, p in enumerate(paragraphs)
+        ],
+        "topic": "benchmark topic",
+        "style": "expository",
+        "estimated_difficulty": 3
+    })
+
+
+def _questions_reply(prompt):
+    types = ["main idea", "inference", "detail", "function", "tone"]
+    return json.dumps({
+        "topic": "benchmark topic",
+        "style": "expository",
+        "structure": "argument",
+        "questions": [
+            {
+                "question_text": f"Benchmark question {i + 1}?",
+                "question_type": types[i % len(types)],
+                "correct_answer": "A",
+                "choices": {"A": "Right", "B": "Wrong", "C": "Wrong", "D": "Wrong"},
+                "trap_types": {"B": "distortion", "C": "out of scope", "D": "extreme"},
+                "explanations": {label: f"Why {label}." for label in "ABCD"},
+                "linked_paragraph": 1,
+                "difficulty_rating": 3
+            }
+            for i in range(6)
+        ]
+    })
+
+
+def _rubric_reply(prompt):
+    fields = [t for t in ["rephrase", "purpose", "flow", "implied"] if f'"{t}":' in prompt]
+    return json.dumps({t: {"score": 4, "feedback": "Clear and accurate, but could be more concise."} for t in fields})
+
+
+CANNED_REPLIES = [
+    ("rhetorical_purpose", _annotation_reply),
+    ("exam author", _questions_reply),
+    ("paragraph_number", lambda prompt: json.dumps({"paragraph_number": 1})),
+    ("evaluate a student's responses", _rubric_reply),
+]
+DEFAULT_REPLY = "Rating: 4/5. Clear and accurate, but could be more concise."
+
+
+# Deterministic unit-ish vector for a text, so the same text always embeds the same way
+def fake_embedding(text, dim=EMBEDDING_DIM):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.gauss(0, 1) / dim ** 0.5 for _ in range(dim)]
+
+
+# The SDK asks for base64-packed float32 by default and decodes it itself
+def encode_embedding(vector, encoding_format):
+    if encoding_format == "base64":
+        return base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+    return vector
+
+
+# Stand-in for the OpenAI REST API (chat completions, embeddings, models) with
+# configurable latency, error rate and canned responses. Used by bench_pipeline.py.
+class FakeLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.05, error_rate=0.0, replies=None, seed=None, token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency  # delay between streamed words
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.replies = dict(replies or {})
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "chat": 0, "embeddings": 0}
+        self._stats_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def chat_reply(self, messages):
+        prompt = messages[-1]["content"] if messages else ""
+        everything = " ".join(m.get("content", "") for m in messages)
+        for marker, reply in self.replies.items():
+            if marker in everything:
+                return reply
+        for marker, make_reply in CANNED_REPLIES:
+            if marker in everything:
+                return make_reply(prompt)
+        return DEFAULT_REPLY
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # Server-sent events in the chat.completion.chunk format, a word at a time
+            def _send_stream(self, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                created = int(time.time())
+                words = re.findall(r"\S+\s*", content) or [""]
+                deltas = [{"role": "assistant", "content": ""}] + [{"content": w} for w in words] + [{}]
+                for i, delta in enumerate(deltas):
+                    finish = "stop" if i == len(deltas) - 1 else None
+                    chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if fake.token_latency and 0 < i < len(deltas) - 1:
+                        time.sleep(fake.token_latency)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _simulate_network(self):
+                fake._count("requests")
+                delay = max(0.0, fake.latency + fake.rng.uniform(-fake.jitter, fake.jitter))
+                time.sleep(delay)
+                if fake.rng.random() < fake.error_rate:
+                    fake._count("errors")
+                    status = fake.rng.choice([429, 500, 503])
+                    self._send(status, {"error": {"message": "simulated failure", "type": "server_error", "code": status}})
+                    return False
+                return True
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model", "created": 0, "owned_by": "fake"}]})
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self._simulate_network():
+                    return
+
+                if self.path.endswith("/chat/completions"):
+                    fake._count("chat")
+                    content = fake.chat_reply(request.get("messages", []))
+                    if request.get("stream"):
+                        self._send_stream(request.get("model", "fake"), content)
+                        return
+                    self._send(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                    })
+                elif self.path.endswith("/embeddings"):
+                    fake._count("embeddings")
+                    inputs = request.get("input", [])
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    self._send(200, {
+                        "object": "list",
+                        "data": [{"object": "embedding", "index": i, "embedding": encode_embedding(fake_embedding(t), request.get("encoding_format"))} for i, t in enumerate(inputs)],
+                        "model": request.get("model", "fake"),
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0}
+                    })
+                else:
+                    self._send(404, {"error": {"message": f"unknown endpoint {self.path}"}})
+
+        return Handler
+
+
+# Run standalone: OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python <any pipeline script>
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for offline runs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/5xx")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed words")
+    parser.add_argument("--replies", help="JSON file mapping a prompt substring to a canned reply")
+    args = parser.parse_args()
+
+    replies = None
+    if args.replies:
+        with open(args.replies, "r", encoding="utf-8") as f:
+            replies = json.load(f)
+
+    server = FakeLLMServer(port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, replies=replies, token_latency=args.token_latency)
+    print(f"🧪 Fake LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,40 +1,45 @@
+import argparse
 import os
 import json
 import re
+import time
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from jsonl_tail import JsonlTail
+from llm_client import chat_completion
+from worker_pool import map_in_order
 
 PASSAGE_FILE = "training-data/passages.jsonl"
 QUESTION_FILE = "training-data/questions.jsonl"
+JOURNAL_FILE = "training-data/generation_journal.jsonl"
+CHECKPOINT_EVERY = 10  # finished passages between rewrites of PASSAGE_FILE
 os.makedirs("training-data", exist_ok=True)
 
-# Load passages
-with open(PASSAGE_FILE, "r", encoding="utf-8") as f:
-    passages = [json.loads(line.strip()) for line in f if line.strip()]
+# Load passages, plus (inode, offset) of where reading stopped
+def load_passages():
+    tail = JsonlTail(PASSAGE_FILE)
+    return list(tail), (tail.inode, tail.offset)
 
 # Load existing questions to prevent duplication
-existing_qids = set()
-if os.path.exists(QUESTION_FILE):
-    with open(QUESTION_FILE, "r", encoding="utf-8") as f:
-        existing_qids = {json.loads(line)["question_id"] for line in f if line.strip()}
+def load_existing_qids():
+    existing_qids = set()
+    if os.path.exists(QUESTION_FILE):
+        with open(QUESTION_FILE, "r", encoding="utf-8") as f:
+            existing_qids = {json.loads(line)["question_id"] for line in f if line.strip()}
+    return existing_qids
 
 # Helper to call GPT and clean JSON output
 def generate_questions_and_tags(passage):
+    if not passage.get("paragraphs"):
+        raise ValueError(f"❌ Passage {passage.get('passage_id')} has no paragraphs.")
+
     full_text = "\n\n".join([p["text"] for p in passage["paragraphs"]])
     prompt = f"""
     You are a CARS exam author. Based on the MCAT CARS passage below, generate 5–7 MCAT-style CARS questions in strict JSON format.
 
-    if not passage.get("paragraphs"):
-    raise ValueError(f"❌ Passage {passage.get('passage_id')} has no paragraphs.")
-
     Passage:
-    """
+    \"\"\"
     {full_text}
-    """
+    \"\"\"
 
     Return a JSON object with the following fields:
 
@@ -48,16 +53,13 @@ def generate_questions_and_tags(passage):
     ⚠️ Format strictly as raw JSON. Do NOT include markdown or commentary.
     """
 
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
+    raw_output = chat_completion(
         messages=[
             {"role": "system", "content": "You are an expert MCAT CARS tutor and exam author."},
             {"role": "user", "content": prompt}
         ],
         temperature=0.7
-    )
-
-    raw_output = response.choices[0].message.content.strip()
+    ).strip()
     raw_output = re.sub(r'^```json\s*|\s*```$', '', raw_output.strip())
 
     if not raw_output:
@@ -69,31 +71,126 @@ def generate_questions_and_tags(passage):
         print("❌ GPT returned invalid JSON:\n", raw_output)
         raise e
 
-# Store output
-with open(QUESTION_FILE, "a", encoding="utf-8") as qfile, open(PASSAGE_FILE, "w", encoding="utf-8") as pfile:
+# Latest journal record per passage. A "done" record means the passage's questions
+# are already in QUESTION_FILE and its tags are in the record.
+def load_journal():
+    journal = {}
+    if os.path.exists(JOURNAL_FILE):
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                journal[entry["passage_id"]] = entry
+    return journal
+
+# Append a record and make sure it's on disk before moving on
+def append_durably(f, record):
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+# Write to a temp file and rename it over path, so path is always a complete file
+def atomic_write_jsonl(path, records):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# Replace PASSAGE_FILE with `passages`, after folding in whatever other tools
+# (ingest, the batch converters) appended since `seen`, the (inode, offset) we
+# last read up to; a replaced file is read again in full and only unknown ids
+# are taken. Returns the new (inode, offset).
+def checkpoint_passages(passages, seen):
+    known = {p.get("passage_id") for p in passages}
+    for p in JsonlTail(PASSAGE_FILE, *seen):
+        if p.get("passage_id") not in known:
+            passages.append(p)
+            known.add(p.get("passage_id"))
+    atomic_write_jsonl(PASSAGE_FILE, passages)
+    st = os.stat(PASSAGE_FILE)
+    return st.st_ino, st.st_size
+
+def apply_tags(passage, entry):
+    passage["topic"] = entry.get("topic", "unknown")
+    passage["style"] = entry.get("style", "unknown")
+    passage["structure"] = entry.get("structure", "unknown")
+    passage["questions_generated"] = True
+
+# Runs on a worker thread; errors are returned rather than raised so one bad passage doesn't stop the run
+def generate_for_passage(passage):
+    try:
+        return generate_questions_and_tags(passage), None
+    except Exception as e:
+        return None, e
+
+# Generate questions for every passage that doesn't have them yet.
+# Progress goes to JOURNAL_FILE as each passage finishes, so an interrupted run
+# picks up where it stopped; PASSAGE_FILE is only ever replaced atomically, and
+# passages appended to it meanwhile are carried over (they're generated next run).
+def main(workers=1):
+    passages, seen = load_passages()
+    existing_qids = load_existing_qids()
+    journal = load_journal()
+
+    # Tags from a previous run that stopped before its last checkpoint
     for p in passages:
-        if p.get("questions_generated"):
-            continue
-
-        print(f"🧠 Generating for {p['passage_id']}...")
-        try:
-            output = generate_questions_and_tags(p)
-            p["topic"] = output.get("topic", "unknown")
-            p["style"] = output.get("style", "unknown")
-            p["structure"] = output.get("structure", "unknown")
-            p["questions_generated"] = True
-
-            questions = output.get("questions", [])
-            for i, q in enumerate(questions):
-                q["passage_id"] = p["passage_id"]
-                q["question_id"] = f"{p['passage_id']}_q{i+1}"
+        entry = journal.get(p["passage_id"])
+        if entry and entry["status"] == "done" and not p.get("questions_generated"):
+            apply_tags(p, entry)
+
+    todo = [p for p in passages if not p.get("questions_generated")]
+    resumed = sum(1 for e in journal.values() if e["status"] == "done")
+    print(f"🧠 {len(todo)} passage(s) to generate ({len(passages) - len(todo)} already done, {resumed} in journal)")
+
+    finished = failed = 0
+    with open(QUESTION_FILE, "a", encoding="utf-8") as qfile, open(JOURNAL_FILE, "a", encoding="utf-8") as jfile:
+        for p, (output, error) in map_in_order(generate_for_passage, todo, max_workers=workers):
+            pid = p["passage_id"]
+            if error is not None:
+                print(f"❌ Error processing {pid}: {error}")
+                append_durably(jfile, {"passage_id": pid, "status": "failed", "error": str(error), "time": time.time()})
+                failed += 1
+                continue
+
+            written = []
+            for i, q in enumerate(output.get("questions", [])):
+                q["passage_id"] = pid
+                q["question_id"] = f"{pid}_q{i+1}"
                 if q["question_id"] not in existing_qids:
                     if "choices" in q and isinstance(q["choices"], dict) and len(q["choices"]) >= 4:
                         qfile.write(json.dumps(q) + "\n")
-        except Exception as e:
-            print(f"❌ Error processing {p['passage_id']}: {e}")
-
-    for p in passages:
-        pfile.write(json.dumps(p) + "\n")
-
-print("✅ Question generation complete.")
+                        existing_qids.add(q["question_id"])
+                        written.append(q["question_id"])
+            qfile.flush()
+            os.fsync(qfile.fileno())
+
+            entry = {
+                "passage_id": pid,
+                "status": "done",
+                "topic": output.get("topic", "unknown"),
+                "style": output.get("style", "unknown"),
+                "structure": output.get("structure", "unknown"),
+                "question_ids": written,
+                "time": time.time()
+            }
+            append_durably(jfile, entry)
+            apply_tags(p, entry)
+            print(f"✅ {pid}: {len(written)} question(s)")
+
+            finished += 1
+            if finished % CHECKPOINT_EVERY == 0:
+                seen = checkpoint_passages(passages, seen)
+
+    checkpoint_passages(passages, seen)
+    print(f"✅ Question generation complete: {finished} generated, {failed} failed.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate questions for passages, resuming from the generation journal")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent generation requests")
+    args = parser.parse_args()
+    main(workers=args.workers)
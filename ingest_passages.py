@@ -1,49 +1,87 @@
-import os
-import json
+import argparse
 import glob
+import hashlib
+import json
+import os
 from pathlib import Path
+from passage_index import get_passage_index
 
 RAW_DIRS = ["raw-passages", "data"]
 TARGET_FILE = "training-data/passages.jsonl"
-PROCESSED_IDS = set()
+MANIFEST_SUFFIX = ".manifest.json"  # next to TARGET_FILE
 
-# Load existing passage IDs to avoid duplicates and get max ID
-def load_existing_passage_ids():
-    if not os.path.exists(TARGET_FILE):
-        return set(), 0
-    existing_ids = set()
-    max_num = 0
-    with open(TARGET_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            data = json.loads(line)
-            pid = data.get("passage_id")
-            if pid:
-                existing_ids.add(pid)
-                if pid[0] == "p" and pid[1:].isdigit():
-                    max_num = max(max_num, int(pid[1:]))
-    return existing_ids, max_num
+# training-data/passages.jsonl -> training-data/passages.manifest.json
+def manifest_path_for(target_file):
+    return Path(target_file).with_suffix(MANIFEST_SUFFIX)
+
+# {source path: {size, mtime_ns, sha256, passage_ids, assigned_ids}} from the last run
+def load_manifest(target_file):
+    path = manifest_path_for(target_file)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        print(f"⚠️ Ignoring corrupt manifest {path}; every source will be re-read")
+        return {}
+
+def save_manifest(target_file, files):
+    path = manifest_path_for(target_file)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _file_sig(file_path):
+    st = os.stat(file_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+# Tag passage entries from one source file with where they came from
+def parse_source(raw, source_label):
+    data = json.loads(raw)
+    entries = data if isinstance(data, list) else [data]
+    for p in entries:
+        p["source"] = source_label
+        p["processed_by"] = "gpt-4" if "gpt" in source_label else "manual"
+        p["generated_by"] = "auto" if "gpt" in source_label else "user"
+    return entries
 
-# Load passage entries from .json files in each source folder
-def collect_passages():
-    passages = []
+# Load passage entries from .json files in each source folder that changed since
+# the manifest was written. A file whose size and mtime match isn't opened; one
+# that was only touched (same sha256) isn't parsed. Returns
+# [(file_path, entries, manifest record)] for the files that need ingesting and
+# updates `manifest` in place for the rest.
+def collect_passages(manifest, rescan=False):
+    changed = []
+    seen = set()
     for folder in RAW_DIRS:
         source_label = folder.replace("-passages", "").replace("_", "-")
-        files = glob.glob(os.path.join(folder, "*.json"))
-        for file_path in files:
-            with open(file_path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    entries = data if isinstance(data, list) else [data]
-                    for p in entries:
-                        p["source"] = source_label
-                        p["processed_by"] = "gpt-4" if "gpt" in source_label else "manual"
-                        p["generated_by"] = "auto" if "gpt" in source_label else "user"
-                        passages.append(p)
-                except Exception as e:
-                    print(f"❌ Error loading {file_path}: {e}")
-    return passages
+        for file_path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+            seen.add(file_path)
+            sig = _file_sig(file_path)
+            previous = manifest.get(file_path)
+            if not rescan and previous and all(previous[k] == sig[k] for k in sig):
+                continue
+
+            with open(file_path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if not rescan and previous and previous["sha256"] == digest:
+                previous.update(sig)
+                continue
+
+            try:
+                entries = parse_source(raw, source_label)
+            except Exception as e:
+                print(f"❌ Error loading {file_path}: {e}")
+                continue
+            record = dict(sig, sha256=digest, passage_ids=[], assigned_ids=(previous or {}).get("assigned_ids", []))
+            changed.append((file_path, entries, record))
+
+    for file_path in set(manifest) - seen:
+        del manifest[file_path]  # source removed; its passages stay ingested
+    return changed
 
 # Write only new passages to training-data/passages.jsonl
 def write_passages(new_passages):
@@ -51,24 +89,54 @@ def write_passages(new_passages):
         for entry in new_passages:
             f.write(json.dumps(entry) + "\n")
 
-# Ingest pipeline
-if __name__ == "__main__":
+# Ingest pipeline. Only sources that changed since the last run are read, and
+# passage ids are checked against the passage index rather than the target file.
+def main(rescan=False):
     print("🔍 Scanning for new passages...")
-    Path("training-data").mkdir(exist_ok=True)
-    PROCESSED_IDS, MAX_ID = load_existing_passage_ids()
-    all_passages = collect_passages()
+    Path(TARGET_FILE).parent.mkdir(parents=True, exist_ok=True)
+    index = get_passage_index(TARGET_FILE)
+    manifest = load_manifest(TARGET_FILE)
+    changed = collect_passages(manifest, rescan)
 
+    next_number = index.max_passage_number
     new_passages = []
-    for i, p in enumerate(all_passages):
-        if not p.get("passage_id"):
-            MAX_ID += 1
-            p["passage_id"] = f"p{MAX_ID:03}"
-        if p["passage_id"] not in PROCESSED_IDS:
-            new_passages.append(p)
+    new_ids = set()
+    for file_path, entries, record in changed:
+        # Passages without an id get the ids this file was given last time, in
+        # order, so an edited source doesn't re-ingest them under fresh ids
+        reusable = list(record["assigned_ids"])
+        assigned = []
+        for p in entries:
+            if not p.get("passage_id"):
+                if reusable:
+                    p["passage_id"] = reusable.pop(0)
+                else:
+                    next_number += 1
+                    p["passage_id"] = f"p{next_number:03}"
+                assigned.append(p["passage_id"])
+            record["passage_ids"].append(p["passage_id"])
+            if not index.has_passage(p["passage_id"]) and p["passage_id"] not in new_ids:
+                new_ids.add(p["passage_id"])
+                new_passages.append(p)
+        record["assigned_ids"] = assigned
+        manifest[file_path] = record
 
     if new_passages:
+        # Record the assigned ids first, with the changed files marked unread: if
+        # the run dies mid-write, the next one re-reads them, hands out the same
+        # ids, and the index skips the passages that did make it
+        save_manifest(TARGET_FILE, dict(manifest, **{path: dict(record, size=None, sha256=None) for path, _, record in changed}))
         print(f"✅ Found {len(new_passages)} new passage(s). Writing to {TARGET_FILE}...")
         write_passages(new_passages)
+        get_passage_index(TARGET_FILE)  # folds just the appended lines into the index
         print("✨ Ingestion complete.")
     else:
         print("📭 No new passages found.")
+    save_manifest(TARGET_FILE, manifest)
+    print(f"🗂️ {len(changed)} changed source file(s), {len(manifest)} tracked in {manifest_path_for(TARGET_FILE)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append new passages from raw-passages/ and data/ to the training set")
+    parser.add_argument("--rescan", action="store_true", help="re-read every source file, ignoring the manifest")
+    args = parser.parse_args()
+    main(rescan=args.rescan)
@@ -0,0 +1,46 @@
+import json
+import os
+
+
+# Reads the complete JSONL records appended to a file since a saved position
+# (inode, byte offset). Shared by the indexes that follow append-only files
+# (user logs, passages.jsonl, questions.jsonl) so they agree on the rules:
+#   - a replaced file (new inode), one that shrank, or one whose offset no longer
+#     falls just after a line break was rewritten: start over, with reset=True
+#   - only complete lines are consumed; a half-written tail is left for next time
+# Iterating yields records and advances .offset; save (.inode, .offset) afterwards.
+class JsonlTail:
+    def __init__(self, path, inode=None, offset=0):
+        self.path = path
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+        self.exists = st is not None
+        self.inode = st.st_ino if st else inode
+        self.size = st.st_size if st else 0
+        self.reset = bool(st) and ((inode is not None and inode != st.st_ino) or st.st_size < offset)
+        self.start = self.offset = 0 if self.reset else offset
+        if self.exists and not self.reset and offset:
+            with open(path, "rb") as f:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    self.reset = True  # rewritten in place
+                    self.start = self.offset = 0
+
+    # Whether there's anything past the saved offset (without opening the file)
+    @property
+    def has_new(self):
+        return self.exists and self.size != self.offset
+
+    def __iter__(self):
+        if not self.has_new:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # still being written
+                self.offset += len(raw)
+                if raw.strip():
+                    yield json.loads(raw)
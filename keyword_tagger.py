@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_right
+
+# keyword Categories
+KEYWORDS = {
+    "contrast": ['however', 'but', 'although', 'yet', 'nevertheless', 'rather', 'in contrast', 'on the other hand', 'otherwise', 'nevertheless', 'wheras', 'while', 'different', 'unlike'],
+    "similarity": ['and', 'also', 'moreover', 'futhermore', 'like', 'same', 'similar','that is', 'in other words', 'for example', 'for instance', 'take the case of', 'including', 'such as', 'in addition', 'at the same time', 'as well as', 'equally', 'this','that', 'these', 'those', ';',':', '-'],
+    "opposition": ['not', 'never', 'none', 'on the contrary', 'as opposed to', 'versus', 'otherwise'],
+    "emphasis": ['indeed', 'in fact', 'clearly', 'must', 'above all'],
+    "moderating": ['can', 'could', 'may', 'might', 'possibly', 'probably', 'sometimes', 'on occasion', 'often', 'tends to', 'here', 'now', 'in this case', 'in some sense'],
+    "logic": ['because', 'since', 'therefore', 'as a result', 'due to']
+}
+
+SEPARATOR = "\n\n"  # joins texts in batch mode; no keyword can match across it
+
+
+# Regex for one keyword. Word keywords only match as whole words ("but" not in
+# "attribute"); punctuation keywords like ";" match anywhere.
+def keyword_pattern(keyword):
+    pattern = re.escape(keyword)
+    if re.match(r"\w", keyword):
+        pattern = r"(?<!\w)" + pattern
+    if re.search(r"\w$", keyword):
+        pattern = pattern + r"(?!\w)"
+    return pattern
+
+
+# All keyword lists compiled into one case-insensitive alternation, so a text is
+# tagged in a single regex pass. Longer phrases are tried first; a phrase also
+# carries the categories of any keyword nested inside it ("in this case" is
+# moderating, and similarity through "this"), so no tags are lost to overlaps.
+class KeywordTagger:
+    def __init__(self, keywords=KEYWORDS):
+        self.category_order = list(keywords)
+        own = {}
+        for category, words in keywords.items():
+            for word in words:
+                own.setdefault(word.lower(), set()).add(category)
+
+        self.categories = {}
+        for word, cats in own.items():
+            merged = set(cats)
+            for other, other_cats in own.items():
+                if other != word and re.search(keyword_pattern(other), word):
+                    merged |= other_cats
+            self.categories[word] = [c for c in self.category_order if c in merged]
+
+        alternation = "|".join(keyword_pattern(w) for w in sorted(own, key=len, reverse=True))
+        self.regex = re.compile(alternation, re.IGNORECASE)
+
+    # Keyword hits as (start, end, keyword, categories)
+    def find(self, text):
+        return [
+            (m.start(), m.end(), m.group(0).lower(), self.categories[m.group(0).lower()])
+            for m in self.regex.finditer(text)
+        ]
+
+    # Categories present in text, in KEYWORDS order
+    def tag(self, text):
+        found = set()
+        for m in self.regex.finditer(text):
+            found.update(self.categories[m.group(0).lower()])
+        return [c for c in self.category_order if c in found]
+
+    # find() for many texts in one pass over their concatenation; offsets are per text
+    def find_many(self, texts):
+        texts = list(texts)
+        starts = []
+        pos = 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + len(SEPARATOR)
+
+        results = [[] for _ in texts]
+        for m in self.regex.finditer(SEPARATOR.join(texts)):
+            i = bisect_right(starts, m.start()) - 1
+            word = m.group(0).lower()
+            results[i].append((m.start() - starts[i], m.end() - starts[i], word, self.categories[word]))
+        return results
+
+    def tag_many(self, texts):
+        tags = []
+        for matches in self.find_many(texts):
+            found = {c for _, _, _, cats in matches for c in cats}
+            tags.append([c for c in self.category_order if c in found])
+        return tags
+
+
+_default_tagger = None
+
+
+def get_tagger():
+    global _default_tagger
+    if _default_tagger is None:
+        _default_tagger = KeywordTagger()
+    return _default_tagger
+
+
+def find_keywords(text):
+    return get_tagger().find(text)
+
+
+def tag_text(text):
+    return get_tagger().tag(text)
+
+
+def tag_texts(texts):
+    return get_tagger().tag_many(texts)
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+
+load_dotenv()
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_MAX = 30.0
+
+# On-disk response cache, keyed by a hash of the full request
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", ".llm_cache"))
+CACHE_ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("off", "0", "false")
+CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", 30)) * 24 * 60 * 60
+CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", 500)) * 1024 * 1024)
+EVICT_EVERY = 200  # cache writes between eviction sweeps
+
+_client = None
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+
+# Shared OpenAI client, created on first use. Retries are handled here, not by the SDK.
+def get_client():
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _client
+
+
+# 429s, 5xx and connection problems are worth retrying; other 4xx are not
+def is_retryable(error):
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+# Call fn(), retrying retryable API errors with full-jitter exponential backoff
+def with_retries(fn, max_retries=MAX_RETRIES):
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            print(f"⏳ LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+# Stable content hash of everything that determines the response
+def cache_key(model, messages, temperature, **kwargs):
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, **kwargs},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def _bump(counter, n=1):
+    with _cache_lock:
+        _cache_stats[counter] += n
+
+
+def cache_get(key):
+    path = _cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        _bump("misses")
+        return None
+    if time.time() - entry.get("created", 0) > CACHE_MAX_AGE:
+        path.unlink(missing_ok=True)
+        _bump("misses")
+        return None
+    os.utime(path)  # mtime doubles as last-used time for size eviction
+    _bump("hits")
+    return entry["content"]
+
+
+def cache_put(key, content):
+    path = _cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.time(), "content": content}, f)
+    os.replace(tmp_path, path)
+    _bump("writes")
+    if _cache_stats["writes"] % EVICT_EVERY == 0:
+        evict_cache()
+
+
+# Drop entries older than the max age, then least recently used ones until under the size cap
+def evict_cache(max_age=CACHE_MAX_AGE, max_bytes=CACHE_MAX_BYTES):
+    if not CACHE_DIR.exists():
+        return 0
+    now = time.time()
+    entries = []
+    removed = 0
+    for path in CACHE_DIR.glob("*/*.json"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        # mtime >= created, so an untouched-for-max-age file is certainly expired
+        if now - st.st_mtime > max_age:
+            path.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+
+    _bump("evicted", removed)
+    return removed
+
+
+def cache_stats():
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
+# One chat completion, returning the message text.
+# Identical requests (model, messages, temperature, extra kwargs) are served from
+# the on-disk cache; pass use_cache=False or set LLM_CACHE=off to bypass it.
+def chat_completion(messages, model=DEFAULT_MODEL, temperature=0.5, use_cache=True, **kwargs):
+    use_cache = use_cache and CACHE_ENABLED
+    if use_cache:
+        key = cache_key(model, messages, temperature, **kwargs)
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+
+    response = with_retries(lambda: get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        **kwargs
+    ))
+    content = response.choices[0].message.content
+
+    if use_cache and content:
+        cache_put(key, content)
+    return content
+
+
+# Same request as chat_completion, but yields the reply text piece by piece as the
+# model produces it. A cache hit yields the whole reply at once; a complete
+# streamed reply is cached like any other. Only opening the stream is retried,
+# since pieces already yielded can't be taken back.
+def stream_chat_completion(messages, model=DEFAULT_MODEL, temperature=0.5, use_cache=True, **kwargs):
+    use_cache = use_cache and CACHE_ENABLED
+    if use_cache:
+        key = cache_key(model, messages, temperature, **kwargs)
+        cached = cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    stream = with_retries(lambda: get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        **kwargs
+    ))
+    pieces = []
+    finished = False
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.delta and choice.delta.content:
+            pieces.append(choice.delta.content)
+            yield choice.delta.content
+        if choice.finish_reason:
+            finished = True
+
+    if use_cache and finished and pieces:
+        cache_put(key, "".join(pieces))
+
+
+# Cache maintenance from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the on-disk LLM response cache")
+    parser.add_argument("--evict", action="store_true", help="apply age/size eviction now")
+    parser.add_argument("--clear", action="store_true", help="delete every cached response")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"🧹 Cleared {evict_cache(max_age=-1)} cached response(s) from {CACHE_DIR}")
+    elif args.evict:
+        print(f"🧹 Evicted {evict_cache()} cached response(s) from {CACHE_DIR}")
+
+    files = list(CACHE_DIR.glob("*/*.json")) if CACHE_DIR.exists() else []
+    size_mb = sum(f.stat().st_size for f in files) / (1024 * 1024)
+    print(f"📦 {len(files)} cached response(s), {size_mb:.1f} MB in {CACHE_DIR}")
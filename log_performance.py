@@ -1,68 +1,109 @@
 import json
 import os
+import threading
 from datetime import datetime
+from user_log_index import sync_user_indexes
 
+USER_DIR = "user"
 USER_PROFILE_PATH = "user/user_profile.json"
 USER_LOG_PATH = "user/user_logs.jsonl"
+MAX_LOGGED_SESSIONS = 200  # session ids remembered for replay protection
 os.makedirs("user", exist_ok=True)
 
+_write_lock = threading.Lock()
+
 # Initialize profile if it doesn't exist
-def initialize_profile():
-    if not os.path.exists(USER_PROFILE_PATH):
+def initialize_profile(profile_path=USER_PROFILE_PATH):
+    if not os.path.exists(profile_path):
         profile = {
             "question_stats": {},
             "difficulty_stats": {str(i): {"seen": 0, "correct": 0} for i in range(1, 11)},
             "recent_activity": []
         }
-        with open(USER_PROFILE_PATH, "w") as f:
+        with open(profile_path, "w") as f:
             json.dump(profile, f, indent=2)
 
-# Log one question result
-def log_question_performance(question_id, question_type, difficulty, was_correct):
-    initialize_profile()
-
-    # Load existing profile
-    with open(USER_PROFILE_PATH, "r") as f:
-        profile = json.load(f)
+# Fold one result into the in-memory profile
+def update_profile_stats(profile, result):
+    question_type = result["question_type"]
+    was_correct = result["was_correct"]
 
     # Update question stats
-    q_stats = profile["question_stats"].setdefault(question_type, {"attempts": 0, "correct": 0})
+    q_stats = profile.setdefault("question_stats", {}).setdefault(question_type, {"attempts": 0, "correct": 0})
     q_stats["attempts"] += 1
     if was_correct:
         q_stats["correct"] += 1
 
     # Update difficulty stats
-    diff_key = str(difficulty)
-    if diff_key not in profile["difficulty_stats"]:
-        profile["difficulty_stats"][diff_key] = {"seen": 0, "correct": 0}
-    profile["difficulty_stats"][diff_key]["seen"] += 1
+    diff_key = str(result["difficulty"])
+    d_stats = profile.setdefault("difficulty_stats", {}).setdefault(diff_key, {"seen": 0, "correct": 0})
+    d_stats["seen"] += 1
     if was_correct:
-        profile["difficulty_stats"][diff_key]["correct"] += 1
+        d_stats["correct"] += 1
 
-    # Add to recent activity
-    profile["recent_activity"].insert(0, {
-        "question_id": question_id,
-        "question_type": question_type,
-        "difficulty": difficulty,
-        "was_correct": was_correct,
-        "timestamp": datetime.now().isoformat()
-    })
-    profile["recent_activity"] = profile["recent_activity"][:100]  # keep last 100
+# Log a whole study set with one profile read-modify-write and one log append.
+# results: dicts with question_id, question_type, difficulty, was_correct.
+# With a session_id, replaying the same set (e.g. refreshing the review page) is a no-op.
+def log_session_performance(results, session_id=None, user_dir=USER_DIR):
+    user_dir = str(user_dir)
+    os.makedirs(user_dir, exist_ok=True)
+    profile_path = os.path.join(user_dir, "user_profile.json")
+    log_path = os.path.join(user_dir, "user_logs.jsonl")
+
+    with _write_lock:
+        initialize_profile(profile_path)
+
+        # Load existing profile
+        with open(profile_path, "r") as f:
+            profile = json.load(f)
 
-    # Save profile
-    with open(USER_PROFILE_PATH, "w") as f:
-        json.dump(profile, f, indent=2)
+        logged_sessions = profile.setdefault("logged_sessions", [])
+        if session_id and session_id in logged_sessions:
+            return False
 
-    # Save full log line
-    log_entry = {
+        timestamp = datetime.now().isoformat()
+        log_entries = []
+        for result in results:
+            update_profile_stats(profile, result)
+            log_entries.append({
+                "question_id": result["question_id"],
+                "passage_id": result["question_id"].split("_")[0],
+                "question_type": result["question_type"],
+                "difficulty": result["difficulty"],
+                "was_correct": result["was_correct"],
+                "timestamp": timestamp
+            })
+
+        # Add to recent activity, newest first
+        recent = [{k: v for k, v in e.items() if k != "passage_id"} for e in reversed(log_entries)]
+        profile["recent_activity"] = (recent + profile.get("recent_activity", []))[:100]  # keep last 100
+
+        if session_id:
+            logged_sessions.append(session_id)
+            profile["logged_sessions"] = logged_sessions[-MAX_LOGGED_SESSIONS:]
+
+        # Save full log lines first: if we die before the profile is replaced, the
+        # session isn't marked as logged yet, rather than logged with its lines lost
+        with open(log_path, "a") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in log_entries))
+
+        # Save profile
+        tmp_path = profile_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp_path, profile_path)
+
+    sync_user_indexes(user_dir)
+    return True
+
+# Log one question result
+def log_question_performance(question_id, question_type, difficulty, was_correct, user_dir=USER_DIR):
+    log_session_performance([{
         "question_id": question_id,
         "question_type": question_type,
         "difficulty": difficulty,
-        "was_correct": was_correct,
-        "timestamp": datetime.now().isoformat()
-    }
-    with open(USER_LOG_PATH, "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
+        "was_correct": was_correct
+    }], user_dir=user_dir)
 
     print(f"✅ Logged result for {question_id} ({'correct' if was_correct else 'wrong'})")
 
@@ -1,8 +1,14 @@
 import feedparser
 import requests
 from newspaper import Article
+import argparse
 import json
-import os 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from keyword_tagger import tag_texts
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
@@ -11,59 +17,104 @@ headers = {
 # Define RSS Feed
 # rss_url = "https://www.nybooks.com/feed/"
 rss_url = "https://www.theatlantic.com/feed/all/"
-response = requests.get(rss_url, headers=headers)
-
-feed = feedparser.parse(response.text)
-print(f"Found {len(feed.entries)} articles in RSS feed")
-
-# keyword Categories
-keywords = {
-    "contrast": ['however', 'but', 'although', 'yet', 'nevertheless', 'rather', 'in contrast', 'on the other hand', 'otherwise', 'nevertheless', 'wheras', 'while', 'different', 'unlike'],
-    "similarity": ['and', 'also', 'moreover', 'futhermore', 'like', 'same', 'similar','that is', 'in other words', 'for example', 'for instance', 'take the case of', 'including', 'such as', 'in addition', 'at the same time', 'as well as', 'equally', 'this','that', 'these', 'those', ';',':', '-'],
-    "opposition": ['not', 'never', 'none', 'on the contrary', 'as opposed to', 'versus', 'otherwise'],
-    "emphasis": ['indeed', 'in fact', 'clearly', 'must', 'above all'],
-    "moderating": ['can', 'could', 'may', 'might', 'possibly', 'probably', 'sometimes', 'on occasion', 'often', 'tends to', 'here', 'now', 'in this case', 'in some sense'],
-    "logic": ['because', 'since', 'therefore', 'as a result', 'due to']
-}
+OUTPUT_FILE = "data/articles.json"
+
+# One pooled session for the feed and every article download
+def make_session(pool_size):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Caps concurrent downloads per host so one site isn't hammered
+class HostLimiter:
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+def download_html(session, limiter, url, timeout):
+    with limiter.slot(url):
+        response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+# CPU-heavy part; runs in a worker process on HTML we already downloaded
+def parse_article(url, html):
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+def tag_paragraphs(text):
+    paragraphs = [p.strip() for p in text.split('\n') if len(p.strip()) > 80]
+    return [
+        {"text": para, "tags": tags}
+        for para, tags in zip(paragraphs, tag_texts(paragraphs))
+    ]
+
+# Fetch the feed, download articles on a thread pool and parse them on a process pool.
+# Parsing of one article overlaps with downloading the next ones; output keeps feed order.
+def ingest_feed(feed_url=rss_url, limit=None, workers=8, per_host=4, timeout=15, parse_procs=None):
+    session = make_session(pool_size=workers)
+    response = session.get(feed_url, timeout=timeout)
+    response.raise_for_status()
+
+    feed = feedparser.parse(response.text)
+    print(f"Found {len(feed.entries)} articles in RSS feed")
+    entries = feed.entries[:limit] if limit else feed.entries
+    limiter = HostLimiter(per_host)
+
+    with ThreadPoolExecutor(max_workers=workers) as downloads, ProcessPoolExecutor(max_workers=parse_procs) as parsers:
+        # Each download hands its HTML straight to the parser pool when it finishes
+        def fetch_and_parse(entry):
+            html = download_html(session, limiter, entry.link, timeout)
+            return parsers.submit(parse_article, entry.link, html)
+
+        pending = [(entry, downloads.submit(fetch_and_parse, entry)) for entry in entries]
+
+        article_data = []
+        for entry, download in pending:
+            print(f"Processing: {entry.title}")
+            try:
+                text = download.result().result()
+                print("✅ Article downloaded and parsed")
+            except Exception as e:
+                print(f"Skipping {entry.title} due to error: {e}")
+                continue
+
+            article_data.append({
+                "title": entry.title,
+                "url": entry.link,
+                "paragraphs": tag_paragraphs(text)
+            })
+
+    return article_data
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pull articles from an RSS feed into data/articles.json")
+    parser.add_argument("--feed", default=rss_url, help="RSS feed URL")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N feed entries (default: all)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=4, help="max concurrent downloads per host")
+    parser.add_argument("--timeout", type=float, default=15, help="per-request timeout in seconds")
+    parser.add_argument("--parse-procs", type=int, default=None, help="parser processes (default: CPU count)")
+    args = parser.parse_args()
+
+    article_data = ingest_feed(args.feed, args.limit, args.workers, args.per_host, args.timeout, args.parse_procs)
+
+    # Save to JSON
+    os.makedirs("data", exist_ok=True)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(article_data, f, indent=2)
 
-#output list
-
-article_data = []
-
-# Fetch and process first 3 articles
-for entry in feed.entries[:3]:
-    print(f"Processing: {entry.title}")
-    try:
-        article = Article(entry.link)
-        article.download()
-        article.parse()
-        print("✅ Article downloaded and parsed")
-    except Exception as e:
-        print(f"Skipping {entry.title} due to error: {e}")
-        continue
-    
-    paragraphs = [p.strip() for p in article.text.split('\n') if len(p.strip()) > 80]
-    processed_paragraphs = []
-    
-    for para in paragraphs:
-        tags = []
-        for tag, words in keywords.items():
-            if any(word in para.lower() for word in words):
-                tags.append(tag)
-        processed_paragraphs.append({
-            "text": para,
-            "tags": tags
-        })
-        
-        article_data.append({
-            "title": entry.title,
-            "url": entry.link,
-            "paragraphs": processed_paragraphs
-        })
-        
-# Save to JSON
-os.makedirs("data", exist_ok=True)
-with open("data/articles.json", "w", encoding="utf-8") as f:
-    json.dump(article_data, f, indent=2)
-    
-print("✅ Saved data to data/articles.json")
\ No newline at end of file
+    print(f"✅ Saved {len(article_data)} article(s) to {OUTPUT_FILE}")
@@ -0,0 +1,177 @@
+import argparse
+import re
+from collections import defaultdict
+import numpy as np
+
+NEAR_DUPLICATE_THRESHOLD = 0.7  # Jaccard similarity of shingle sets
+NUM_PERM = 128
+SHINGLE_WORDS = 2         # a paraphrase that swaps one word only breaks two shingles
+CHUNK_SHINGLES = 1 << 16  # shingles hashed per numpy batch; the hash matrix is 64 MB at NUM_PERM=128
+_FOLD = np.uint64(0x9E3779B97F4A7C15)  # odd multiplier for folding word ids into one code
+
+
+# Text a question is compared on: stem plus answer choices, lowercased, punctuation dropped
+def question_text(question):
+    choices = question.get("choices") or {}
+    parts = [question.get("question_text", "")] + [str(choices[k]) for k in sorted(choices)]
+    return " ".join(re.findall(r"\w+", " ".join(parts).lower()))
+
+
+# Shingle sets for many texts at once. Words get integer ids, each run of k word
+# ids is folded into one 64-bit code, and duplicates within a text are dropped
+# with one sort over (text, code). Returns (values, offsets): text i's sorted
+# unique shingle codes are values[offsets[i]:offsets[i + 1]].
+def shingle_sets(texts, k=SHINGLE_WORDS):
+    vocab = {}
+    ids, counts = [], []
+    for text in texts:
+        words = [vocab.setdefault(w, len(vocab) + 1) for w in text.split()]
+        if 0 < len(words) < k:
+            words += [0] * (k - len(words))  # short texts still get one shingle
+        ids.extend(words)
+        counts.append(len(words))
+
+    ids = np.array(ids, dtype=np.uint64)
+    lengths = np.array(counts, dtype=np.int64)
+    windows_per_text = np.maximum(lengths - k + 1, 0)
+    if not windows_per_text.sum():
+        return np.zeros(0, dtype=np.uint64), np.zeros(len(texts) + 1, dtype=np.int64)
+
+    codes = np.zeros(len(ids) - k + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            codes = codes * _FOLD + ids[j:len(ids) - k + 1 + j]
+
+    # Keep only windows that start and end inside the same text
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    first_window = np.repeat(starts - np.concatenate(([0], np.cumsum(windows_per_text)[:-1])), windows_per_text)
+    codes = codes[np.arange(windows_per_text.sum()) + first_window]
+    docs = np.repeat(np.arange(len(texts)), windows_per_text)
+
+    order = np.lexsort((codes, docs))
+    codes, docs = codes[order], docs[order]
+    fresh = np.ones(len(codes), dtype=bool)
+    fresh[1:] = (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])
+    values, docs = codes[fresh], docs[fresh]
+    offsets = np.searchsorted(docs, np.arange(len(texts) + 1))
+    return values, offsets
+
+
+# LSH banding (bands, rows) using up to num_perm signature values. Pairs at
+# similarity s collide in some band with probability 1 - (1 - s**rows)**bands;
+# pick the split whose 50% point, (1/bands)**(1/rows), is the highest one at or
+# below the threshold, so true duplicates are rarely missed and the exact check
+# on candidates filters out the rest.
+def lsh_params(threshold, num_perm=NUM_PERM):
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1)]
+    below = [br for br in options if (1 / br[0]) ** (1 / br[1]) <= threshold]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1])) if below else options[0]
+
+
+# MinHash signatures (one row of num_perm uint32 per text). Hash functions are
+# multiply-shift, (a*x + b) mod 2**64 >> 32, so a batch of shingles goes through
+# all of them in one numpy op; each text's minimum is taken with reduceat.
+def minhash_signatures(values, offsets, num_perm=NUM_PERM, seed=1):
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    n_docs = len(offsets) - 1
+    signatures = np.full((n_docs, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+    sizes = np.diff(offsets)
+    start = 0
+    while start < n_docs:
+        # Whole texts per batch, about CHUNK_SHINGLES shingles each
+        end = max(int(np.searchsorted(offsets, offsets[start] + CHUNK_SHINGLES, side="right")) - 1, start + 1)
+        end = min(end, n_docs)
+        docs = np.arange(start, end)[sizes[start:end] > 0]  # empty texts keep the max signature
+        if len(docs):
+            chunk = values[offsets[start]:offsets[end]]
+            with np.errstate(over="ignore"):
+                hashed = ((a[:, None] * chunk[None, :] + b[:, None]) >> np.uint64(32)).astype(np.uint32)
+            signatures[docs] = np.minimum.reduceat(hashed, offsets[docs] - offsets[start], axis=1).T
+        start = end
+    return signatures
+
+
+# Jaccard similarity of two sorted unique shingle arrays
+def jaccard(x, y):
+    if not len(x) and not len(y):
+        return 1.0
+    shared = len(np.intersect1d(x, y, assume_unique=True))
+    return shared / (len(x) + len(y) - shared)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+# Groups of questions whose text + choices are at least `threshold` similar.
+# Only pairs sharing an LSH bucket are compared (exact Jaccard on their shingles),
+# and each bucket only against one representative, so the cost grows with the
+# number of questions, not the number of pairs.
+# Returns clusters as lists of questions, each in input order, largest first.
+def find_near_duplicates(questions, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=NUM_PERM, shingle_words=SHINGLE_WORDS, seed=1):
+    questions = list(questions)
+    values, offsets = shingle_sets([question_text(q) for q in questions], shingle_words)
+    signatures = minhash_signatures(values, offsets, num_perm, seed)
+    bands, rows = lsh_params(threshold, num_perm)
+    has_text = np.diff(offsets) > 0
+
+    def shingles_of(i):
+        return values[offsets[i]:offsets[i + 1]]
+
+    uf = _UnionFind(len(questions))
+    for band in range(bands):
+        # Rows with identical band values share a bucket; group them with one sort
+        band_keys = np.ascontiguousarray(signatures[has_text, band * rows:(band + 1) * rows])
+        band_keys = band_keys.view(np.dtype((np.void, rows * 4))).ravel()
+        ids = np.flatnonzero(has_text)
+        order = np.argsort(band_keys, kind="stable")
+        sorted_keys = band_keys[order]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for members in np.split(ids[order], boundaries):
+            if len(members) < 2:
+                continue
+            # Each member is checked against one representative only, so a huge
+            # bucket (templated questions) stays linear. The representative
+            # rotates by band, so a pair one band misses can meet in another.
+            members = members.tolist()
+            rep = members[band % len(members)]
+            for j in members:
+                if j != rep and uf.find(rep) != uf.find(j) and jaccard(shingles_of(rep), shingles_of(j)) >= threshold:
+                    uf.union(rep, j)
+
+    clusters = defaultdict(list)
+    for i in range(len(questions)):
+        clusters[uf.find(i)].append(questions[i])
+    return sorted((c for c in clusters.values() if len(c) > 1), key=len, reverse=True)
+
+
+if __name__ == "__main__":
+    from question_store import get_question_store
+
+    parser = argparse.ArgumentParser(description="Find paraphrased duplicate questions with MinHash/LSH")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD, help="Jaccard similarity, 0-1 (default: %(default)s)")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM, help="MinHash permutations")
+    args = parser.parse_args()
+
+    questions = get_question_store().list_questions()
+    clusters = find_near_duplicates(questions, args.threshold, args.num_perm)
+    print(f"🔎 {len(clusters)} near-duplicate cluster(s) among {len(questions)} question(s)")
+    for cluster in clusters:
+        print(f"\n🧬 {len(cluster)} similar questions:")
+        for q in cluster:
+            print(f"  - {q['question_id']}: {q.get('question_text', '')[:100]}")
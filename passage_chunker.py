@@ -0,0 +1,95 @@
+import re
+from functools import lru_cache
+
+ENCODING_NAME = "cl100k_base"  # gpt-3.5-turbo / gpt-4 / text-embedding-3-*
+DEFAULT_TARGET_TOKENS = 700    # ~500 words of essay prose
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+_encoder = None
+
+
+# tiktoken is optional; without it token counts are estimated from words and punctuation
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(ENCODING_NAME)
+        except Exception:
+            _encoder = False
+    return _encoder
+
+
+# Model tokens in text. Cached, since the same paragraph is counted again whenever
+# it's carried into the next chunk as overlap or re-chunked with other settings.
+@lru_cache(maxsize=8192)
+def count_tokens(text):
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text))
+    # Long words split into several BPE tokens; ~1.3 tokens per word on English prose
+    return sum(1 + len(w) // 8 for w in _WORD_RE.findall(text))
+
+
+def _paragraph_text(paragraph):
+    return paragraph["text"] if isinstance(paragraph, dict) else paragraph
+
+
+# Pack consecutive paragraphs into chunks of about target_tokens model tokens.
+#   overlap_tokens: carry up to this many tokens of trailing paragraphs from the
+#                   previous chunk into the next one, for context
+#   min_tokens:     a last chunk with less new text than this is merged into the
+#                   previous one (if that stays under max_tokens) instead of
+#                   being left as a stub
+# Paragraphs are never split or dropped: one longer than the budget becomes a
+# chunk of its own. Returns [{"text", "paragraph_indices", "token_count"}].
+def chunk_paragraphs(paragraphs, target_tokens=DEFAULT_TARGET_TOKENS, overlap_tokens=0,
+                     min_tokens=None, max_tokens=None, joiner="\n\n"):
+    if min_tokens is None:
+        min_tokens = target_tokens // 3
+    if max_tokens is None:
+        max_tokens = target_tokens * 3 // 2
+
+    texts = [_paragraph_text(p).strip() for p in paragraphs]
+    items = [(i, t, count_tokens(t)) for i, t in enumerate(texts) if t]
+
+    groups = []  # (overlap items, new items)
+    carry, current, size = [], [], 0
+    for item in items:
+        if current and size + item[2] > target_tokens:
+            groups.append((carry, current))
+            carry = _trailing_overlap(carry + current, overlap_tokens)
+            current, size = [], sum(c[2] for c in carry)
+        current.append(item)
+        size += item[2]
+    if current:
+        groups.append((carry, current))
+
+    # Merge a short tail back into the previous chunk
+    if len(groups) > 1:
+        tail_carry, tail = groups[-1]
+        prev_carry, prev = groups[-2]
+        tail_size = sum(t[2] for t in tail)
+        merged_size = sum(p[2] for p in prev_carry + prev) + tail_size
+        if tail_size < min_tokens and merged_size <= max_tokens:
+            groups[-2:] = [(prev_carry, prev + tail)]
+
+    return [_make_chunk(carry + new, joiner) for carry, new in groups]
+
+
+def _trailing_overlap(items, overlap_tokens):
+    carry, size = [], 0
+    for item in reversed(items[1:]):  # never carry the whole previous chunk, overlap included
+        if size + item[2] > overlap_tokens:
+            break
+        carry.insert(0, item)
+        size += item[2]
+    return carry
+
+
+def _make_chunk(items, joiner):
+    return {
+        "text": joiner.join(t for _, t, _ in items),
+        "paragraph_indices": [i for i, _, _ in items],
+        "token_count": sum(n for _, _, n in items),
+    }
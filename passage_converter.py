@@ -1,11 +1,7 @@
 import json
 import os
 import uuid
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import chat_completion
 
 # Output path
 os.makedirs("training-data", exist_ok=True)
@@ -36,15 +32,13 @@ Return JSON like:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        content = chat_completion(
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.5
         )
-        content = response.choices[0].message.content
         parsed = json.loads(content)
         return parsed
     except Exception as e:
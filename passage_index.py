@@ -0,0 +1,179 @@
+import argparse
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+from jsonl_tail import JsonlTail
+
+PASSAGE_FILE = "training-data/passages.jsonl"
+QUESTION_FILE = "training-data/questions.jsonl"
+INDEX_SUFFIX = ".index.json"  # passages.jsonl -> passages.index.json, next to it
+
+
+def index_path_for(passage_file):
+    return Path(passage_file).with_suffix(INDEX_SUFFIX)
+
+
+def _passage_id_number(pid):
+    return int(pid[1:]) if pid and pid[0] == "p" and pid[1:].isdigit() else 0
+
+
+# Inverted index over the passage corpus for recommendations:
+#   purposes[rhetorical_purpose][passage_id]  -> paragraphs with that purpose
+#   question_types[question_type][passage_id] -> questions of that type
+#   passages[passage_id]                      -> the few fields a recommendation shows
+# Like the user log indexes, it remembers how far into passages.jsonl and
+# questions.jsonl it has read, so appended lines (ingest, question generation)
+# are folded in incrementally. A file that was replaced or shrank is re-read.
+class PassageIndex:
+    def __init__(self, passage_file=PASSAGE_FILE, question_file=QUESTION_FILE):
+        self.passage_file = passage_file
+        self.question_file = question_file
+        self.index_path = index_path_for(passage_file)
+        self._lock = threading.Lock()
+        self.reset_passages()
+        self.reset_questions()
+        self.offsets = {}  # file key -> [inode, bytes consumed]
+        self._load()
+
+    def reset_passages(self):
+        self.purposes = {}
+        self.passages = {}
+        self.max_passage_number = 0
+
+    def reset_questions(self):
+        self.question_types = {}
+
+    def add_passage(self, passage):
+        pid = passage["passage_id"]
+        if pid in self.passages:
+            return  # first occurrence wins, as in ingest
+        self.passages[pid] = {
+            "title": passage.get("title"),
+            "journal": passage.get("journal"),
+            "estimated_difficulty": passage.get("estimated_difficulty", 5),
+            "order": len(self.passages),
+        }
+        self.max_passage_number = max(self.max_passage_number, _passage_id_number(pid))
+        for para in passage.get("paragraphs", []):
+            purpose = para.get("rhetorical_purpose")
+            if purpose:
+                postings = self.purposes.setdefault(purpose, {})
+                postings[pid] = postings.get(pid, 0) + 1
+
+    def add_question(self, question):
+        qtype = question.get("question_type")
+        if qtype:
+            postings = self.question_types.setdefault(qtype, {})
+            postings[question["passage_id"]] = postings.get(question["passage_id"], 0) + 1
+
+    def has_passage(self, passage_id):
+        return passage_id in self.passages
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.purposes = data["purposes"]
+            self.passages = data["passages"]
+            self.max_passage_number = data["max_passage_number"]
+            self.question_types = data["question_types"]
+            self.offsets = data["offsets"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            print(f"⚠️ Rebuilding corrupt index {self.index_path}")
+            self.reset_passages()
+            self.reset_questions()
+            self.offsets = {}
+
+    def save(self):
+        data = {
+            "purposes": self.purposes,
+            "passages": self.passages,
+            "max_passage_number": self.max_passage_number,
+            "question_types": self.question_types,
+            "offsets": self.offsets,
+        }
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    # Feed records appended to path since the last read to add(); returns True if anything was read
+    def _tail(self, key, path, reset, add):
+        inode, offset = self.offsets.get(key, (None, 0))
+        tail = JsonlTail(path, inode, offset)
+        if not tail.exists:
+            return False
+        if tail.reset:
+            reset()  # replaced or truncated: start over
+        for record in tail:
+            add(record)
+        self.offsets[key] = [tail.inode, tail.offset]
+        return tail.reset or tail.offset != tail.start
+
+    # Fold in whatever was appended to either file; saves if anything changed
+    def sync(self):
+        with self._lock:
+            changed = self._tail("passages", self.passage_file, self.reset_passages, self.add_passage)
+            changed = self._tail("questions", self.question_file, self.reset_questions, self.add_question) or changed
+            if changed:
+                self.save()
+        return changed
+
+    def rebuild(self):
+        with self._lock:
+            self.reset_passages()
+            self.reset_questions()
+            self.offsets = {}
+        self.sync()
+        return self
+
+    # Passages matching the most of the given features, best first:
+    #   purpose_terms:  substrings of rhetorical purposes (matched against the
+    #                   purpose vocabulary, not the passages)
+    #   question_types: exact question types
+    # Score is the number of distinct matched purposes and question types;
+    # ties go to the easier, then earlier, passage. Only the posting lists of the
+    # matched features are touched, and a k-sized heap picks the winners.
+    def top_passages(self, purpose_terms=(), question_types=(), k=5):
+        scores = {}
+        matched_purposes = [p for p in self.purposes if any(term in p for term in purpose_terms)]
+        for feature_postings in [self.purposes[p] for p in matched_purposes] + [self.question_types.get(t, {}) for t in question_types]:
+            for pid in feature_postings:
+                scores[pid] = scores.get(pid, 0) + 1
+
+        def rank(pid):
+            info = self.passages.get(pid, {})
+            return (-scores[pid], info.get("estimated_difficulty", 5), info.get("order", 0))
+
+        best = heapq.nsmallest(k, (pid for pid in scores if pid in self.passages), key=rank)
+        return [dict(self.passages[pid], passage_id=pid, score=scores[pid]) for pid in best]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Shared, synced index for a passage file (one per process)
+def get_passage_index(passage_file=PASSAGE_FILE, question_file=QUESTION_FILE):
+    key = (os.path.abspath(passage_file), os.path.abspath(question_file))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = PassageIndex(passage_file, question_file)
+    index = _indexes[key]
+    index.sync()
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the passage inverted index")
+    parser.add_argument("--passages", default=PASSAGE_FILE)
+    parser.add_argument("--questions", default=QUESTION_FILE)
+    args = parser.parse_args()
+
+    index = PassageIndex(args.passages, args.questions).rebuild()
+    print(f"✅ Indexed {len(index.passages)} passage(s), {len(index.purposes)} purpose(s), "
+          f"{len(index.question_types)} question type(s) → {index.index_path}")
@@ -0,0 +1,283 @@
+import json
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from llm_client import chat_completion, stream_chat_completion
+
+# The four prompts asked for every sentence, in order
+PROMPT_STEPS = [
+    ("rephrase", "🗣️ Rephrase: "),
+    ("purpose", "🎯 Purpose: "),
+    ("flow", "🔗 Flow: "),
+    ("implied", "💡 Implied meaning: "),
+]
+
+# blocking:  wait for each answer's feedback before the next prompt
+# pipelined: grade in the background; show feedback as soon as it's back, finish at sentence end
+# deferred:  grade in the background; show all of a sentence's feedback at the end of it
+# combined:  grade all four answers in one request at the end of the sentence
+FEEDBACK_MODES = ["blocking", "pipelined", "deferred", "combined"]
+DEFAULT_FEEDBACK_MODE = "pipelined"
+FEEDBACK_WORKERS = 4
+
+# Chat messages asking for feedback on one answer
+def feedback_messages(sentence, prompt_type, user_response):
+    system_msg = (
+        "You are an MCAT CARS tutor. Your goal is to evaluate a student's response to a comprehension prompt. "
+        "Be brief but constructive. Rate the response from 1 to 5 and explain why."
+    )
+
+    prompt_templates = {
+        "rephrase": f"""Evaluate the student's rephrasing of this sentence:
+
+Sentence: "{sentence}"
+Student rephrased it as: "{user_response}"
+
+Provide feedback and rate from 1 to 5.
+""",
+        "purpose": f"""Evaluate the student's analysis of the rhetorical purpose of this sentence:
+
+Sentence: "{sentence}"
+Student's response: "{user_response}"
+
+Is it accurate? Explain and rate from 1 to 5.
+""",
+        "flow": f"""Evaluate how well the student explained the connection between this sentence and the previous one:
+
+Sentence: "{sentence}"
+Student's response: "{user_response}"
+
+Give a short critique and a rating from 1 to 5.
+""",
+        "implied": f"""Evaluate the student's understanding of the implied meaning in this sentence:
+
+Sentence: "{sentence}"
+Student's response: "{user_response}"
+
+Give feedback and rate from 1 to 5.
+"""
+    }
+
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": prompt_templates[prompt_type]}
+    ]
+
+
+# GPT Feedback Function. With on_token, the reply is streamed and each piece is
+# passed to on_token as it arrives; the full text is still returned.
+def get_ai_feedback(sentence, prompt_type, user_response, on_token=None):
+    messages = feedback_messages(sentence, prompt_type, user_response)
+    try:
+        if on_token is None:
+            return chat_completion(messages=messages, temperature=0.5)
+        pieces = []
+        for piece in stream_chat_completion(messages=messages, temperature=0.5):
+            pieces.append(piece)
+            on_token(piece)
+        return "".join(pieces)
+    except Exception as e:
+        return f"⚠️ Error retrieving feedback: {e}"
+
+
+# What each rubric field grades, for the single-call combined request
+RUBRIC = {
+    "rephrase": "the student's rephrasing of the sentence",
+    "purpose": "the student's analysis of the sentence's rhetorical purpose",
+    "flow": "how well the student connected the sentence to the previous one",
+    "implied": "the student's understanding of what the sentence implies",
+}
+
+# Grade all four answers for a sentence in one request. Fields the model leaves
+# out or gets wrong fall back to an individual get_ai_feedback call.
+def get_combined_feedback(sentence, answers):
+    system_msg = (
+        "You are an MCAT CARS tutor. Your goal is to evaluate a student's responses to comprehension prompts. "
+        "Be brief but constructive. Rate each response from 1 to 5 and explain why. Respond only with JSON."
+    )
+    graded = [t for t in RUBRIC if t in answers]
+    rubric_lines = "\n".join(f'- "{t}": {RUBRIC[t]}. Student\'s response: "{answers[t]}"' for t in graded)
+    schema = ",\n".join(f'  "{t}": {{"score": 1-5, "feedback": "..."}}' for t in graded)
+    prompt = f"""Evaluate the student's responses about this sentence:
+
+Sentence: "{sentence}"
+
+{rubric_lines}
+
+Return JSON like:
+{{
+{schema}
+}}
+"""
+
+    feedback = {}
+    try:
+        content = chat_completion(
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.5,
+            response_format={"type": "json_object"}
+        )
+        feedback = parse_rubric_feedback(content, graded)
+    except Exception as e:
+        print(f"⚠️ Combined feedback failed, grading answers one at a time: {e}")
+
+    for prompt_type in graded:
+        if prompt_type not in feedback:
+            feedback[prompt_type] = get_ai_feedback(sentence, prompt_type, answers[prompt_type])
+    return feedback
+
+
+# {prompt_type: "Rating: n/5. critique"} for each well-formed field of a rubric reply
+def parse_rubric_feedback(content, prompt_types):
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    feedback = {}
+    for prompt_type in prompt_types:
+        field = data.get(prompt_type)
+        if not isinstance(field, dict):
+            continue
+        try:
+            score = int(field.get("score"))
+        except (TypeError, ValueError):
+            continue
+        critique = field.get("feedback")
+        if 1 <= score <= 5 and isinstance(critique, str) and critique.strip():
+            feedback[prompt_type] = f"Rating: {score}/5. {critique.strip()}"
+    return feedback
+
+
+def _grade_one(sentence, prompt_type, user_response, tokens=None):
+    try:
+        return {prompt_type: get_ai_feedback(sentence, prompt_type, user_response, tokens.put if tokens else None)}
+    finally:
+        if tokens:
+            tokens.put(None)
+
+
+def _print_token(piece):
+    print(piece, end="", flush=True)
+
+
+# Grades answers on a small thread pool while the student types the next one.
+# Feedback is always printed in the order the answers were given. With stream=True,
+# feedback that isn't back yet when it's due is printed token by token as it arrives.
+class FeedbackPipeline:
+    def __init__(self, mode=DEFAULT_FEEDBACK_MODE, workers=FEEDBACK_WORKERS, stream=False):
+        if mode not in FEEDBACK_MODES:
+            raise ValueError(f"Unknown feedback mode: {mode}")
+        self.mode = mode
+        self.stream = stream and mode != "combined"  # combined replies are JSON, nothing to show until parsed
+        self.executor = None if mode == "blocking" else ThreadPoolExecutor(max_workers=workers)
+        self.pending = deque()  # (prompt_type, future returning {prompt_type: feedback}, token queue), not yet printed
+        self.answers = {}       # combined mode: this sentence's answers so far
+        self.sentence = None
+        self.results = {}
+
+    def submit(self, sentence, prompt_type, user_response):
+        if self.executor is None:
+            if self.stream:
+                print(self._label(prompt_type), end=" ", flush=True)
+                self.results[prompt_type] = get_ai_feedback(sentence, prompt_type, user_response, _print_token)
+                print()
+            else:
+                self._show(_grade_one(sentence, prompt_type, user_response))
+        elif self.mode == "combined":
+            self.sentence = sentence
+            self.answers[prompt_type] = user_response
+            if len(self.answers) == len(PROMPT_STEPS):
+                self._submit_combined()
+        else:
+            tokens = queue.Queue() if self.stream else None
+            future = self.executor.submit(_grade_one, sentence, prompt_type, user_response, tokens)
+            self.pending.append((prompt_type, future, tokens))
+
+    def _submit_combined(self):
+        future = self.executor.submit(get_combined_feedback, self.sentence, self.answers)
+        self.pending.append((None, future, None))
+        self.answers = {}
+
+    # Print whatever has come back so far (pipelined mode only)
+    def show_ready(self):
+        if self.mode != "pipelined":
+            return
+        while self.pending and self.pending[0][1].done():
+            self._show(self.pending.popleft()[1].result())
+
+    # Wait for the rest of this sentence's feedback; returns {prompt_type: feedback}
+    def flush(self):
+        if self.answers:
+            self._submit_combined()
+        if self.pending:
+            print("⏳ Waiting for feedback..." if self.mode == "pipelined" else "\n🤖 Feedback for this sentence:")
+        while self.pending:
+            prompt_type, future, tokens = self.pending.popleft()
+            if tokens is None or future.done():
+                self._show(future.result())
+            else:
+                self._stream(prompt_type, future, tokens)
+        results, self.results = self.results, {}
+        return results
+
+    # Replay the pieces received so far, then print the rest as they arrive
+    def _stream(self, prompt_type, future, tokens):
+        print(self._label(prompt_type), end=" ", flush=True)
+        shown = []
+        for piece in iter(tokens.get, None):
+            shown.append(piece)
+            _print_token(piece)
+        feedback = future.result()[prompt_type]
+        if feedback != "".join(shown):  # failed part-way: show the error too
+            print("\n" + feedback, end="")
+        print()
+        self.results[prompt_type] = feedback
+
+    def _label(self, prompt_type):
+        return "🤖 Feedback:" if self.mode == "blocking" else f"🤖 Feedback ({prompt_type}):"
+
+    def _show(self, feedback):
+        for prompt_type, text in feedback.items():
+            self.results[prompt_type] = text
+            print(self._label(prompt_type), text)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Ask the four prompts for one sentence and return the response record
+def drill_sentence(sentence, pipeline):
+    answers = {}
+    for prompt_type, label in PROMPT_STEPS:
+        pipeline.show_ready()
+        answers[prompt_type] = input(label)
+        pipeline.submit(sentence, prompt_type, answers[prompt_type])
+
+    feedback = pipeline.flush()
+    record = {"text": sentence}
+    for prompt_type, _ in PROMPT_STEPS:
+        record[prompt_type] = answers[prompt_type]
+        record[f"{prompt_type}_feedback"] = feedback.get(prompt_type)
+    return record
+
+
+def add_feedback_arguments(parser):
+    parser.add_argument("--feedback-mode", choices=FEEDBACK_MODES, default=DEFAULT_FEEDBACK_MODE,
+                        help="when to show AI feedback (default: %(default)s)")
+    parser.add_argument("--feedback-workers", type=int, default=FEEDBACK_WORKERS,
+                        help="concurrent feedback requests in pipelined/deferred mode")
+    parser.add_argument("--stream", action="store_true",
+                        help="print feedback token by token as it arrives (not used in combined mode)")
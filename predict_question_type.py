@@ -1,43 +1,42 @@
 import os
-import json
-import joblib
-from dotenv import load_dotenv
-from openai import OpenAI
+import threading
 
-# Load OpenAI key and initialize
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Load saved model and label encoder
+# Saved model and label encoder; loaded on first prediction, not at import
 MODEL_PATH = "models/question_type_model.joblib"
 ENCODER_PATH = "models/label_encoder.joblib"
-
-model = joblib.load(MODEL_PATH)
-le = joblib.load(ENCODER_PATH)
-
-# Embed text using OpenAI
-def embed_text(text):
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        print("Embedding error:", e)
-        return None
+MODEL_MMAP = os.getenv("QUESTION_TYPE_MODEL_MMAP", "0") == "1"  # memory-map numpy arrays instead of copying them in
+
+_model = None
+_le = None
+_load_lock = threading.Lock()
+
+# Load (once) and return the classifier and label encoder
+def load_model(mmap=MODEL_MMAP):
+    global _model, _le
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                import joblib
+                mmap_mode = "r" if mmap else None
+                _le = joblib.load(ENCODER_PATH, mmap_mode=mmap_mode)
+                _model = joblib.load(MODEL_PATH, mmap_mode=mmap_mode)
+    return _model, _le
 
 # Predict question type given a passage + question
 def predict_question_type(passage_title, paragraph_text, question_text):
+    from embedding_store import embed_text
+
     combined_input = f"PASSAGE TITLE: {passage_title}\nPARAGRAPH: {paragraph_text}\nQUESTION: {question_text}"
     embedding = embed_text(combined_input)
     if not embedding:
         return None, None
 
-    pred_label_idx = model.predict([embedding])[0]
+    model, le = load_model()
+    # One predict_proba call gives both the label (argmax) and the distribution
     proba = model.predict_proba([embedding])[0]
+    best = max(range(len(proba)), key=proba.__getitem__)
     class_probs = dict(zip(le.classes_, proba))
-    return le.inverse_transform([pred_label_idx])[0], class_probs
+    return le.inverse_transform([model.classes_[best]])[0], class_probs
 
 # CLI entry for quick testing
 if __name__ == "__main__":
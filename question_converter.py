@@ -1,10 +1,6 @@
 import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_client import chat_completion
 
 PASSAGE_FILE = "training-data/passages.jsonl"
 QUESTION_FILE = "training-data/questions.jsonl"
@@ -52,15 +48,14 @@ Return this format:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        content = chat_completion(
             messages=[
                 {"role": "system", "content": "You are a CARS tutor and MCAT question analyst."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.3
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         print("❌ GPT error:", e)
         return None
@@ -1,37 +1,7 @@
 import json
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import chat_completion
 from predict_question_type import predict_question_type
-
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-QUESTION_FILE = "training-data/questions.jsonl"
-PASSAGE_FILE = "training-data/passages.jsonl"
-TEMP_FILE = "training-data/questions_temp.jsonl"
-
-def load_passages():
-    passages = {}
-    with open(PASSAGE_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            entry = json.loads(line.strip())
-            passages[entry["passage_id"]] = entry
-    return passages
-
-def load_questions():
-    with open(QUESTION_FILE, "r", encoding="utf-8") as f:
-        return [json.loads(line.strip()) for line in f]
-
-def save_questions(questions):
-    with open(TEMP_FILE, "w", encoding="utf-8") as f:
-        for q in questions:
-            f.write(json.dumps(q) + "\n")
-    os.replace(TEMP_FILE, QUESTION_FILE)
-
-def list_questions_by_passage(questions, pid):
-    return [q for q in questions if q["passage_id"] == pid]
+from question_store import get_question_store
 
 def display_question(q, passage=None):
     print(f"\n\U0001F9E0 {q['question_id']}")
@@ -72,15 +42,14 @@ Response format:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        content = chat_completion(
             messages=[
                 {"role": "system", "content": "You are a CARS tutor assistant."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0
         )
-        parsed = json.loads(response.choices[0].message.content)
+        parsed = json.loads(content)
         return parsed.get("paragraph_number")
     except Exception as e:
         print("\u274c GPT paragraph suggestion error:", e)
@@ -113,8 +82,11 @@ def edit_question(q, passage):
 def delete_question(questions, qid):
     return [q for q in questions if q["question_id"] != qid]
 
-def create_question(passage_id, all_questions, passage):
+def create_question(passage_id, passage_questions, passage):
     question_text = input("\n❓ Question text:\n")
+    choices = {label: input(f"{label}. Choice: ") for label in "ABCD"}
+    correct = input("Correct answer (A-D): ").strip().upper()
+    explanations = {label: input(f"Explanation for {label}: ") for label in "ABCD"}
 
     auto_type = input("🤖 Auto-predict question type using ML model? (y/n): ").lower()
 
@@ -132,8 +104,9 @@ def create_question(passage_id, all_questions, passage):
     else:
         qtype = input("📎 Enter question type manually: ")
     
-    existing_ids = [q["question_id"] for q in all_questions if q["passage_id"] == passage_id]
-    qid = f"{passage_id}_q{len(existing_ids) + 1}"
+    # One past the highest number in use, so ids don't collide after a deletion
+    numbers = [int(q["question_id"].rsplit("_q", 1)[-1]) for q in passage_questions if q["question_id"].rsplit("_q", 1)[-1].isdigit()]
+    qid = f"{passage_id}_q{max(numbers, default=0) + 1}"
 
     auto_link = input("\U0001F517 Auto-suggest linked paragraph using GPT? (y/n): ").lower()
     if auto_link == "y":
@@ -156,17 +129,16 @@ def create_question(passage_id, all_questions, passage):
     }
 
 def main():
-    questions = load_questions()
-    passages = load_passages()
+    store = get_question_store()
 
-    print(f"\n📊 Total questions loaded: {len(questions)}")
+    print(f"\n📊 Total questions in store: {store.count_questions()}")
     passage_id = input("📘 Enter passage ID to manage: ").strip()
 
-    if passage_id not in passages:
+    passage = store.get_passage(passage_id)
+    if passage is None:
         print(f"⚠️ No passage found for ID: {passage_id}")
         return
 
-    passage = passages[passage_id]
     print(f"\n📝 Full Passage for {passage_id}: {passage['title']}")
     print(f"📚 Source: {passage['journal']} | ✍️ {passage['author']}\n")
 
@@ -176,7 +148,7 @@ def main():
         print(f"   📌 Purpose: {para['rhetorical_purpose']}  |  🧭 Tone: {para['tone']}\n")
         print("-" * 60)
 
-    filtered = list_questions_by_passage(questions, passage_id)
+    filtered = store.get_questions_for_passage(passage_id)
     print(f"\n📎 Found {len(filtered)} question(s) for this passage.")
 
     while True:
@@ -212,14 +184,13 @@ def main():
                 print("❌ Question ID not found.")
 
         elif choice == "4":
-            new_q = create_question(passage_id, questions, passage)
+            new_q = create_question(passage_id, filtered, passage)
             filtered.append(new_q)
             print("✅ Question added.")
 
         elif choice == "5":
-            rest = [q for q in questions if q["passage_id"] != passage_id]
-            save_questions(rest + filtered)
-            print("💾 Saved. Exiting.")
+            store.replace_passage_questions(passage_id, filtered)
+            print("💾 Saved. Exiting. Run `python question_store.py --export` to update questions.jsonl.")
             break
 
         elif choice == "6":
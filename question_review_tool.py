@@ -1,25 +1,13 @@
-import json
-import os
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD, find_near_duplicates
+from question_store import get_question_store
 
-QUESTION_FILE = "training-data/questions.jsonl"
-TEMP_FILE = "training-data/questions_temp.jsonl"
-
-def load_questions():
-    with open(QUESTION_FILE, "r", encoding="utf-8") as f:
-        return [json.loads(line.strip()) for line in f]
-
-def detect_duplicates(questions):
-    seen = set()
-    duplicates = []
-    for q in questions:
-        qt = q["question_text"].strip()
-        if qt in seen:
-            duplicates.append(q)
-        else:
-            seen.add(qt)
-    return duplicates
+# Clusters of paraphrased questions (text + choices), via MinHash/LSH
+def detect_duplicates(questions, threshold=NEAR_DUPLICATE_THRESHOLD):
+    return find_near_duplicates(questions, threshold)
 
+# Walk through questions, editing in place; returns the ones that were changed
 def review_questions(questions):
+    edited = []
     for idx, q in enumerate(questions):
         print(f"\n🧠 Question {idx + 1}/{len(questions)} — ID: {q['question_id']}")
         print(f"📘 Passage: {q['passage_id']}")
@@ -46,34 +34,32 @@ def review_questions(questions):
                 new_exp = input(f"Explain {label} (blank = keep): ")
                 if new_exp:
                     q["explanations"][label] = new_exp
+            edited.append(q)
             print("✅ Question updated.")
 
-    return questions
-
-def save_questions(questions):
-    with open(TEMP_FILE, "w", encoding="utf-8") as f:
-        for q in questions:
-            f.write(json.dumps(q) + "\n")
-    os.replace(TEMP_FILE, QUESTION_FILE)
+    return edited
 
 def main():
     print("\n🔎 Loading questions...")
-    questions = load_questions()
+    store = get_question_store()
+    questions = store.list_questions()
     print(f"📊 Loaded {len(questions)} questions.")
 
-    duplicates = detect_duplicates(questions)
-    if duplicates:
-        print(f"\n⚠️ Found {len(duplicates)} duplicate question(s) based on identical text.")
-        for d in duplicates:
-            print(f"  - {d['question_id']}: {d['question_text'][:100]}...")
+    clusters = detect_duplicates(questions)
+    if clusters:
+        print(f"\n⚠️ Found {len(clusters)} group(s) of near-duplicate questions (similarity ≥ {NEAR_DUPLICATE_THRESHOLD}).")
+        for cluster in clusters:
+            print(f"\n🧬 {len(cluster)} similar questions:")
+            for d in cluster:
+                print(f"  - {d['question_id']}: {d['question_text'][:100]}...")
     else:
         print("✅ No duplicate questions detected.")
 
     do_review = input("\n🧪 Do you want to review/edit questions now? (y/n): ").strip().lower()
     if do_review == "y":
-        questions = review_questions(questions)
-        save_questions(questions)
-        print("✅ All updates saved.")
+        edited = review_questions(questions)
+        store.save_questions(edited)
+        print(f"✅ {len(edited)} update(s) saved. Run `python question_store.py --export` to update questions.jsonl.")
 
 if __name__ == "__main__":
     main()
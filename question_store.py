@@ -0,0 +1,422 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from jsonl_tail import JsonlTail
+
+PASSAGE_FILE = "training-data/passages.jsonl"
+QUESTION_FILE = "training-data/questions.jsonl"
+QUESTION_DB_PATH = os.getenv("QUESTION_DB_PATH", "training-data/corpus.db")
+STUDY_QUESTION_FIELDS = ("question_text", "choices", "correct_answer", "explanations")  # read by the study pages
+
+SCHEMA = [
+    # edited = 1: changed through the store, so a full re-import of the JSONL
+    # (e.g. after a checkout replaced the file) doesn't overwrite it
+    "CREATE TABLE IF NOT EXISTS passages ("
+    " passage_id TEXT PRIMARY KEY,"
+    " data TEXT NOT NULL,"
+    " edited INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS questions ("
+    " question_id TEXT PRIMARY KEY,"
+    " passage_id TEXT NOT NULL,"
+    " question_type TEXT,"
+    " data TEXT NOT NULL,"
+    " edited INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS idx_questions_passage ON questions (passage_id)",
+    "CREATE INDEX IF NOT EXISTS idx_questions_type ON questions (question_type)",
+    # Questions deleted through the store; a full re-import doesn't bring them back
+    "CREATE TABLE IF NOT EXISTS deleted_questions ("
+    " question_id TEXT PRIMARY KEY,"
+    " passage_id TEXT NOT NULL)",
+    # Earlier versions of questions whose id was reused in questions.jsonl,
+    # waiting for resolve_duplicates() to give them ids of their own
+    "CREATE TABLE IF NOT EXISTS duplicate_questions ("
+    " question_id TEXT NOT NULL,"
+    " passage_id TEXT NOT NULL,"
+    " data TEXT NOT NULL,"
+    " UNIQUE (question_id, data))",
+    # Where each JSONL file was last imported up to: key -> (inode, mtime, size/offset)
+    "CREATE TABLE IF NOT EXISTS import_state ("
+    " key TEXT PRIMARY KEY,"
+    " inode INTEGER,"
+    " mtime_ns INTEGER,"
+    " offset INTEGER)",
+]
+
+# Columns added since the first version of the schema; fail harmlessly once applied
+MIGRATIONS = [
+    "ALTER TABLE passages ADD COLUMN edited INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE questions ADD COLUMN edited INTEGER NOT NULL DEFAULT 0",
+]
+
+
+def _content(question):
+    return {k: v for k, v in question.items() if k != "question_id"}
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+# Passages and questions in SQLite (WAL), indexed by passage, question id and type.
+# The JSONL files stay the interchange format: generators keep appending to
+# questions.jsonl and rewriting passages.jsonl, and sync_from_jsonl() pulls in
+# just what changed. Edits made here touch only the rows involved; export_jsonl()
+# (the --export CLI) writes the files back out when another tool needs them.
+class QuestionStore:
+    def __init__(self, path=QUESTION_DB_PATH, passage_file=PASSAGE_FILE, question_file=QUESTION_FILE):
+        self.path = path
+        self.passage_file = passage_file
+        self.question_file = question_file
+        self._sync_lock = threading.Lock()
+        self._last_seen = None  # file stats at the last sync, to skip the database when nothing moved
+        self.generation = 0     # bumped whenever this process changes or imports rows
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for statement in MIGRATIONS:
+                try:
+                    conn.execute(statement)
+                except sqlite3.OperationalError:
+                    pass  # column already there
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Bring the tables up to date with the JSONL files. passages.jsonl is re-read
+    # when it changes (it's rewritten as a whole); questions.jsonl is tailed from
+    # the last imported offset, and only re-read in full if it was replaced.
+    # Reading never changes question ids or the files themselves.
+    def sync_from_jsonl(self):
+        seen = self._file_sigs()
+        if seen == self._last_seen:
+            return {"passages": 0, "questions": 0, "duplicates": 0}
+
+        with self._sync_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # one importer at a time across processes
+            imported = self._import_changes(conn)
+        self._last_seen = seen
+        if imported["passages"] or imported["questions"]:
+            self.generation += 1
+        if imported["duplicates"]:
+            print(f"⚠️ {imported['duplicates']} question id(s) in {self.question_file} were reused for a different question; "
+                  f"the newest version is used, earlier ones are kept aside. "
+                  f"Run `python question_store.py --resolve-duplicates` to give them ids of their own.")
+        return imported
+
+    def _file_sigs(self):
+        stats = (_stat(self.passage_file), _stat(self.question_file))
+        return tuple((st.st_ino, st.st_mtime_ns, st.st_size) if st else None for st in stats)
+
+    def _import_changes(self, conn):
+        passage_st = _stat(self.passage_file)
+        question_st = _stat(self.question_file)
+        imported = {"passages": 0, "questions": 0, "duplicates": 0}
+        state = {row[0]: row[1:] for row in conn.execute("SELECT key, inode, mtime_ns, offset FROM import_state")}
+
+        passage_sig = (passage_st.st_ino, passage_st.st_mtime_ns, passage_st.st_size) if passage_st else None
+        if passage_st and state.get("passages") != passage_sig:
+            imported["passages"] = self._import_passages(conn)
+            self._set_state(conn, "passages", passage_sig)
+
+        if question_st:
+            inode, _, offset = state.get("questions", (None, None, 0))
+            tail = JsonlTail(self.question_file, inode, offset)
+            if tail.reset or tail.has_new:
+                imported["questions"], imported["duplicates"] = self._import_questions(conn, tail)
+                self._set_state(conn, "questions", (tail.inode, question_st.st_mtime_ns, tail.offset))
+        return imported
+
+    def _set_state(self, conn, key, sig):
+        conn.execute("INSERT OR REPLACE INTO import_state (key, inode, mtime_ns, offset) VALUES (?, ?, ?, ?)", (key, *sig))
+
+    # Rows edited through the store keep their edits
+    def _import_passages(self, conn):
+        edited = {r[0] for r in conn.execute("SELECT passage_id FROM passages WHERE edited = 1")}
+        count = 0
+        with open(self.passage_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                passage = json.loads(line)
+                if passage["passage_id"] not in edited:
+                    self._upsert_passage(conn, passage)
+                    count += 1
+        return count
+
+    # Import the records a JsonlTail has past its offset. Returns (rows, duplicates
+    # set aside).
+    #   - a reused id means the newest line wins, as it always has; the version it
+    #     replaces goes to duplicate_questions instead of being lost
+    #   - on a full re-read, rows edited or deleted through the store are left alone
+    def _import_questions(self, conn, tail):
+        count = duplicates = 0
+        full = tail.start == 0
+        if full:
+            skip = {r[0] for r in conn.execute("SELECT question_id FROM questions WHERE edited = 1 "
+                                               "UNION SELECT question_id FROM deleted_questions")}
+        else:
+            skip = set()  # appended lines are new; they win over what's stored
+        in_file = set()
+        for question in tail:
+            qid = question["question_id"]
+            if qid in skip:
+                continue
+            if qid in in_file or not full:
+                duplicates += self._set_aside(conn, qid, question)
+            in_file.add(qid)
+            self._upsert_question(conn, question)
+            conn.execute("DELETE FROM deleted_questions WHERE question_id = ?", (qid,))
+            count += 1
+        return count, duplicates
+
+    # Keep the stored version of question_id before `replacement` overwrites it,
+    # unless they're the same question or it's already kept (or resolved)
+    def _set_aside(self, conn, question_id, replacement):
+        row = conn.execute("SELECT passage_id, data FROM questions WHERE question_id = ?", (question_id,)).fetchone()
+        if row is None:
+            return 0
+        old = json.loads(row[1])
+        if _content(old) == _content(replacement) or self._stored_as(conn, old):
+            return 0
+        return conn.execute(
+            "INSERT OR IGNORE INTO duplicate_questions (question_id, passage_id, data) VALUES (?, ?, ?)",
+            (question_id, row[0], row[1])
+        ).rowcount
+
+    # Id of another question with the same content on the same passage, if any
+    def _stored_as(self, conn, question):
+        content = _content(question)
+        rows = conn.execute("SELECT question_id, data FROM questions WHERE passage_id = ? AND question_id != ?",
+                            (question["passage_id"], question["question_id"]))
+        for qid, data in rows:
+            if _content(json.loads(data)) == content:
+                return qid
+        return None
+
+    # Give every set-aside duplicate the next free number on its passage.
+    # Returns [(old id, new id)]. Logs that recorded the old id are not rewritten.
+    def resolve_duplicates(self):
+        resolved = []
+        with self._sync_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT rowid, question_id, data FROM duplicate_questions ORDER BY rowid").fetchall()
+            for rowid, old_id, data in rows:
+                question = json.loads(data)
+                new_id = self._stored_as(conn, question)
+                if new_id is None:
+                    new_id = self._next_question_id(conn, question["passage_id"])
+                    question["question_id"] = new_id
+                    self._upsert_question(conn, question, edited=1)
+                conn.execute("DELETE FROM duplicate_questions WHERE rowid = ?", (rowid,))
+                resolved.append((old_id, new_id))
+        if resolved:
+            self.generation += 1
+        return resolved
+
+    def _next_question_id(self, conn, passage_id):
+        numbers = []
+        rows = conn.execute(
+            "SELECT question_id FROM questions WHERE passage_id = ? "
+            "UNION SELECT question_id FROM deleted_questions WHERE passage_id = ? "
+            "UNION SELECT question_id FROM duplicate_questions WHERE passage_id = ?", (passage_id,) * 3
+        )
+        for (qid,) in rows:
+            suffix = qid.rsplit("_q", 1)[-1]
+            if suffix.isdigit():
+                numbers.append(int(suffix))
+        return f"{passage_id}_q{max(numbers, default=0) + 1}"
+
+    # Write both JSONL files from the tables (temp file + rename), and mark them as
+    # imported. Lines appended since the last sync are imported first, so they
+    # aren't overwritten. Unresolved duplicates are written ahead of the questions
+    # that replaced them, so nothing is dropped and a re-import ends up the same.
+    def export_jsonl(self):
+        with self._sync_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._import_changes(conn)
+            rows = conn.execute("SELECT data FROM passages ORDER BY rowid")
+            self._write_jsonl(self.passage_file, (r[0] for r in rows))
+            rows = conn.execute(
+                "SELECT data FROM (SELECT 0 AS part, rowid, data FROM duplicate_questions "
+                "UNION ALL SELECT 1, rowid, data FROM questions) ORDER BY part, rowid"
+            )
+            self._write_jsonl(self.question_file, (r[0] for r in rows))
+
+            for key, path in (("passages", self.passage_file), ("questions", self.question_file)):
+                st = os.stat(path)
+                self._set_state(conn, key, (st.st_ino, st.st_mtime_ns, st.st_size))
+        self._last_seen = None
+
+    def _write_jsonl(self, path, lines):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+        os.replace(tmp_path, path)
+
+    def has_data(self):
+        with self._connect() as conn:
+            has_passages = conn.execute("SELECT 1 FROM passages LIMIT 1").fetchone()
+            has_questions = conn.execute("SELECT 1 FROM questions LIMIT 1").fetchone()
+        return bool(has_passages and has_questions)
+
+    def _one(self, sql, params):
+        with self._connect() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _many(self, sql, params=()):
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get_passage(self, passage_id):
+        return self._one("SELECT data FROM passages WHERE passage_id = ?", (passage_id,))
+
+    # {passage_id: passage} for the ids that exist, in one query
+    def get_passages(self, passage_ids):
+        passage_ids = list(passage_ids)
+        if not passage_ids:
+            return {}
+        placeholders = ",".join("?" * len(passage_ids))
+        passages = self._many(f"SELECT data FROM passages WHERE passage_id IN ({placeholders})", passage_ids)
+        return {p["passage_id"]: p for p in passages}
+
+    def list_passages(self):
+        return self._many("SELECT data FROM passages ORDER BY rowid")
+
+    def get_question(self, question_id):
+        return self._one("SELECT data FROM questions WHERE question_id = ?", (question_id,))
+
+    def list_questions(self):
+        return self._many("SELECT data FROM questions ORDER BY rowid")
+
+    def get_questions_for_passage(self, passage_id):
+        return self._many("SELECT data FROM questions WHERE passage_id = ? ORDER BY rowid", (passage_id,))
+
+    def get_questions_by_type(self, question_type):
+        return self._many("SELECT data FROM questions WHERE question_type = ? ORDER BY rowid", (question_type,))
+
+    # (question_id, question_type, difficulty) for every question that can be
+    # served in a study set: typed, with the fields the study pages show, and a
+    # passage in the store. difficulty is the difficulty_rating, 5 if unrated.
+    def question_keys(self):
+        complete = " AND ".join(f"json_extract(q.data, '$.{field}') IS NOT NULL" for field in STUDY_QUESTION_FIELDS)
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT q.question_id, q.question_type, COALESCE(json_extract(q.data, '$.difficulty_rating'), 5) "
+                "FROM questions q JOIN passages p ON p.passage_id = q.passage_id "
+                f"WHERE q.question_type IS NOT NULL AND {complete} ORDER BY q.rowid"
+            ).fetchall()
+
+    def count_questions(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    # Upserts keep a row's rowid, so export order stays stable across edits
+    def _upsert_passage(self, conn, passage, edited=0):
+        conn.execute(
+            "INSERT INTO passages (passage_id, data, edited) VALUES (?, ?, ?) "
+            "ON CONFLICT (passage_id) DO UPDATE SET data = excluded.data, edited = excluded.edited",
+            (passage["passage_id"], json.dumps(passage), edited)
+        )
+
+    def _upsert_question(self, conn, question, edited=0):
+        conn.execute(
+            "INSERT INTO questions (question_id, passage_id, question_type, data, edited) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (question_id) DO UPDATE SET passage_id = excluded.passage_id, "
+            "question_type = excluded.question_type, data = excluded.data, edited = excluded.edited",
+            (question["question_id"], question["passage_id"], question.get("question_type"), json.dumps(question), edited)
+        )
+
+    def _save(self, conn, questions):
+        for q in questions:
+            self._upsert_question(conn, q, edited=1)
+            conn.execute("DELETE FROM deleted_questions WHERE question_id = ?", (q["question_id"],))
+
+    def _delete(self, conn, where, params):
+        conn.execute(f"INSERT OR REPLACE INTO deleted_questions SELECT question_id, passage_id FROM questions WHERE {where}", params)
+        return conn.execute(f"DELETE FROM questions WHERE {where}", params).rowcount
+
+    # Edits touch only their own rows; export_jsonl() writes them out to the files
+    def save_passage(self, passage):
+        with self._connect() as conn:
+            self._upsert_passage(conn, passage, edited=1)
+        self.generation += 1
+
+    def save_questions(self, questions):
+        with self._connect() as conn:
+            self._save(conn, questions)
+        self.generation += 1
+
+    def save_question(self, question):
+        self.save_questions([question])
+
+    def delete_question(self, question_id):
+        with self._connect() as conn:
+            deleted = self._delete(conn, "question_id = ?", (question_id,)) > 0
+        self.generation += 1
+        return deleted
+
+    # Make a passage's question set exactly `questions`: upsert those, delete the rest
+    def replace_passage_questions(self, passage_id, questions):
+        keep = [q["question_id"] for q in questions]
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(keep))
+            if keep:
+                self._delete(conn, f"passage_id = ? AND question_id NOT IN ({placeholders})", (passage_id, *keep))
+            else:
+                self._delete(conn, "passage_id = ?", (passage_id,))
+            self._save(conn, questions)
+        self.generation += 1
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Shared per-process store, synced with the JSONL files on each call (two stats
+# when nothing changed), so new generator output shows up without a restart
+def get_question_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = QuestionStore()
+    _store.sync_from_jsonl()
+    return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync or export the SQLite question/passage store")
+    parser.add_argument("--resolve-duplicates", action="store_true", help="give questions set aside under a reused id new ids")
+    parser.add_argument("--export", action="store_true", help=f"write {PASSAGE_FILE} and {QUESTION_FILE} from the database")
+    args = parser.parse_args()
+
+    store = QuestionStore()
+    imported = store.sync_from_jsonl()
+    print(f"📥 Imported {imported['passages']} passage(s), {imported['questions']} question(s) into {store.path}")
+    if args.resolve_duplicates:
+        resolved = store.resolve_duplicates()
+        for old_id, new_id in resolved:
+            print(f"🔢 {old_id} → {new_id}")
+        print(f"✅ Resolved {len(resolved)} duplicate(s); user logs that mention the old ids still point at the newest version")
+    if args.export:
+        store.export_jsonl()
+        print(f"📤 Exported to {PASSAGE_FILE} and {QUESTION_FILE}")
+    print(f"📦 {len(store.list_passages())} passage(s), {store.count_questions()} question(s)")
@@ -1,9 +1,10 @@
 import json
 import os
-from collections import defaultdict
+from passage_index import get_passage_index
 
 USER_PROFILE_PATH = "user/user_profile.json"
 PASSAGE_FILE = "training-data/passages.jsonl"
+RECOMMENDATION_COUNT = 5
 
 def load_user_profile():
     if not os.path.exists(USER_PROFILE_PATH):
@@ -11,16 +12,6 @@ def load_user_profile():
     with open(USER_PROFILE_PATH, "r") as f:
         return json.load(f)
 
-def load_passages():
-    passages = []
-    if not os.path.exists(PASSAGE_FILE):
-        return passages
-    with open(PASSAGE_FILE, "r") as f:
-        for line in f:
-            data = json.loads(line.strip())
-            passages.append(data)
-    return passages
-
 def identify_weak_areas(profile):
     weaknesses = []
     for qtype, stats in profile.get("question_stats", {}).items():
@@ -31,21 +22,13 @@ def identify_weak_areas(profile):
     weaknesses.sort(key=lambda x: x[1])  # sort by lowest accuracy
     return [w[0] for w in weaknesses]
 
-def recommend_passages(profile, passages):
+# Passages covering the most of the user's weak question types, either as a
+# paragraph purpose or as questions of that type, looked up in the passage index
+def recommend_passages(profile, index, k=RECOMMENDATION_COUNT):
     weak_types = identify_weak_areas(profile)
-    recommended = []
-
-    for p in passages:
-        qtypes_in_passage = set()
-        for para in p.get("paragraphs", []):
-            if any(weak in para.get("rhetorical_purpose", "") for weak in weak_types):
-                qtypes_in_passage.add(para.get("rhetorical_purpose"))
-
-        if qtypes_in_passage:
-            recommended.append((p, len(qtypes_in_passage)))
-
-    recommended.sort(key=lambda x: (-x[1], x[0].get("estimated_difficulty", 5)))
-    return [rec[0] for rec in recommended[:5]]
+    if not weak_types:
+        return []
+    return index.top_passages(purpose_terms=weak_types, question_types=weak_types, k=k)
 
 def recommend_next():
     profile = load_user_profile()
@@ -53,12 +36,11 @@ def recommend_next():
         print("⚠️ No user profile found.")
         return
 
-    passages = load_passages()
-    if not passages:
+    if not os.path.exists(PASSAGE_FILE):
         print("⚠️ No passages available.")
         return
 
-    recommendations = recommend_passages(profile, passages)
+    recommendations = recommend_passages(profile, get_passage_index(PASSAGE_FILE))
     print("\n🎯 Recommended Passages:")
     for p in recommendations:
         print(f"- {p['passage_id']}: {p['title']} | Difficulty: {p['estimated_difficulty']} | Source: {p['journal']}")
@@ -1,14 +1,13 @@
 import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import argparse
+from llm_client import chat_completion
+from worker_pool import map_in_order
 
 TEXT_FOLDER = "raw-passages"
 METADATA_FILE = "raw-metadata.json"
 OUTPUT_FILE = "training-data/passages.jsonl"
+MAX_IN_FLIGHT = int(os.getenv("ANNOTATE_WORKERS", 4))
 os.makedirs("training-data", exist_ok=True)
 
 def gpt_annotate_passage(raw_text):
@@ -35,41 +34,48 @@ Return JSON like:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        content = chat_completion(
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.5
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         print("⚠️ GPT error:", e)
         return None
 
-def main():
-    print("📚 Starting smart batch passage converter...\n")
+# Read the raw text for one metadata entry, then annotate it (runs on a worker thread)
+def annotate_entry(meta):
+    pid = meta["passage_id"]
+    txt_path = os.path.join(TEXT_FOLDER, f"{pid}.txt")
+
+    with open(txt_path, "r", encoding="utf-8") as tf:
+        raw_text = tf.read().strip()
+
+    print(f"⏳ Processing: {pid} - {meta['title']}")
+    return raw_text, gpt_annotate_passage(raw_text)
+
+def main(max_in_flight=MAX_IN_FLIGHT):
+    print(f"📚 Starting smart batch passage converter ({max_in_flight} in flight)...\n")
 
     with open(METADATA_FILE, "r", encoding="utf-8") as f:
         metadata_list = json.load(f)
 
+    available = []
+    for meta in metadata_list:
+        if not os.path.exists(os.path.join(TEXT_FOLDER, f"{meta['passage_id']}.txt")):
+            print(f"❌ Missing text file: {meta['passage_id']}.txt")
+            continue
+        available.append(meta)
+
     processed = 0
 
     with open(OUTPUT_FILE, "a", encoding="utf-8") as out:
-        for meta in metadata_list:
+        # Requests overlap, but results are written in metadata order
+        for meta, (raw_text, result) in map_in_order(annotate_entry, available, max_workers=max_in_flight):
             pid = meta["passage_id"]
-            txt_path = os.path.join(TEXT_FOLDER, f"{pid}.txt")
-
-            if not os.path.exists(txt_path):
-                print(f"❌ Missing text file: {pid}.txt")
-                continue
-
-            with open(txt_path, "r", encoding="utf-8") as tf:
-                raw_text = tf.read().strip()
-
-            print(f"⏳ Processing: {pid} - {meta['title']}")
-            result = gpt_annotate_passage(raw_text)
 
             if not result:
                 print(f"❌ GPT failed for: {pid}")
@@ -88,10 +94,14 @@ def main():
             }
 
             out.write(json.dumps(final_entry) + "\n")
+            out.flush()
             print(f"✅ Saved: {pid} (difficulty {result['estimated_difficulty']})\n")
             processed += 1
 
     print(f"\n🎉 Finished! {processed} passage(s) written to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Annotate raw-passages/<id>.txt listed in raw-metadata.json with GPT")
+    parser.add_argument("--workers", type=int, default=MAX_IN_FLIGHT, help="max concurrent GPT requests")
+    args = parser.parse_args()
+    main(max_in_flight=args.workers)
@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import json
+import os
+
+SNIPPET_FILE = os.path.join("data", "comprehension_snippets.jsonl")
+LEGACY_SNIPPET_FILE = os.path.join("data", "comprehension_snippets.json")
+INDEX_SUFFIX = ".idx"  # not .json, so ingest_passages doesn't pick the index up
+
+
+def index_path_for(path):
+    return path + INDEX_SUFFIX
+
+
+# Stable id derived from where the snippet came from and its text
+def snippet_id_for(snippet):
+    key = f"{snippet.get('source') or ''}\n{snippet.get('snippet') or ''}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+# Streams snippets to a JSONL file while recording each line's byte offset, title
+# and source in a small side index. Output goes to temp files that replace the
+# real ones on close, so readers never see a half-written store.
+class SnippetWriter:
+    def __init__(self, path=SNIPPET_FILE):
+        self.path = path
+        self.index_path = index_path_for(path)
+        self.entries = []
+        self._seen = set()
+        self._tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self._tmp_path, "wb")
+
+    def write(self, snippet):
+        snippet.setdefault("snippet_id", snippet_id_for(snippet))
+        sid = snippet["snippet_id"]
+        if sid in self._seen:
+            return sid
+        self._seen.add(sid)
+
+        line = (json.dumps(snippet) + "\n").encode("utf-8")
+        self.entries.append({
+            "snippet_id": sid,
+            "offset": self._file.tell(),
+            "length": len(line),
+            "title": snippet.get("title"),
+            "source": snippet.get("source"),
+            "sentence_count": len(snippet.get("sentences", [])),
+        })
+        self._file.write(line)
+        return sid
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": self.entries}, f)
+        os.replace(tmp_index, self.index_path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# Random access to snippets by id (one seek + one line parse) and filtering on
+# the indexed fields without reading the JSONL at all.
+class SnippetStore:
+    def __init__(self, path=SNIPPET_FILE):
+        self.path = path
+        self.index_path = index_path_for(path)
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            self.entries = json.load(f)["entries"]
+        self.by_id = {e["snippet_id"]: e for e in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def ids(self):
+        return [e["snippet_id"] for e in self.entries]
+
+    def get(self, snippet_id):
+        entry = self.by_id.get(snippet_id)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def first(self):
+        return self.get(self.entries[0]["snippet_id"]) if self.entries else None
+
+    # Index entries matching exact title/source and an optional predicate on the entry
+    def find(self, title=None, source=None, where=None):
+        for e in self.entries:
+            if title is not None and e["title"] != title:
+                continue
+            if source is not None and e["source"] != source:
+                continue
+            if where is not None and not where(e):
+                continue
+            yield e
+
+    # Full snippets for the matching entries, parsed one at a time
+    def iter_snippets(self, **filters):
+        with open(self.path, "rb") as f:
+            for e in self.find(**filters):
+                f.seek(e["offset"])
+                yield json.loads(f.read(e["length"]))
+
+
+# Convert the old single-array comprehension_snippets.json into the indexed store
+def migrate_legacy_json(legacy_path=LEGACY_SNIPPET_FILE, path=SNIPPET_FILE):
+    with open(legacy_path, "r", encoding="utf-8") as f:
+        snippets = json.load(f)
+    with SnippetWriter(path) as writer:
+        for snippet in snippets:
+            writer.write(snippet)
+    return len(writer.entries)
+
+
+# Open the store, migrating the legacy JSON array on first use if that's all there is
+def open_snippet_store(path=SNIPPET_FILE, legacy_path=LEGACY_SNIPPET_FILE):
+    if not os.path.exists(index_path_for(path)) and os.path.exists(legacy_path):
+        count = migrate_legacy_json(legacy_path, path)
+        print(f"📦 Migrated {count} snippet(s) from {legacy_path} to {path}")
+    return SnippetStore(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the indexed comprehension snippet store")
+    parser.add_argument("--migrate", action="store_true", help=f"rebuild the store from {LEGACY_SNIPPET_FILE}")
+    parser.add_argument("--show", metavar="SNIPPET_ID", help="print one snippet as JSON")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print(f"✅ Wrote {migrate_legacy_json()} snippet(s) to {SNIPPET_FILE}")
+
+    store = open_snippet_store()
+    if args.show:
+        print(json.dumps(store.get(args.show), indent=2))
+    else:
+        for e in store.entries:
+            print(f"{e['snippet_id']}  {e['sentence_count']:>3} sentences  {e['title']}")
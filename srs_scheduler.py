@@ -0,0 +1,108 @@
+import argparse
+import heapq
+import time
+from datetime import datetime
+from user_log_index import UserLogIndex, _get_index
+
+DAY = 24 * 60 * 60
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+CORRECT_GRADE = 4    # SM-2 quality (0-5) for a right answer: correct, with some hesitation
+INCORRECT_GRADE = 1  # and for a wrong one: lapse, the card starts over
+
+
+def _log_time(entry):
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0  # undated lines count as long ago, so they're due straight away
+
+
+# SM-2 review state for one question after a graded answer
+def review_card(card, grade, reviewed_at):
+    reps, interval, ease = card["reps"], card["interval"], card["ease"]
+    if grade >= 3:
+        interval = 1 if reps == 0 else 6 if reps == 1 else round(interval * ease)
+        reps += 1
+    else:
+        reps, interval = 0, 1
+    ease = max(ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02), MIN_EASE)
+    return {"reps": reps, "interval": interval, "ease": round(ease, 3), "due": reviewed_at + interval * DAY}
+
+
+# Spaced-repetition schedule for one user, derived from user_logs.jsonl like the
+# other per-user indexes: every answered question is a card with an SM-2
+# interval and ease, and a min-heap of (due, question_id) orders the cards.
+# Re-reviewing a card pushes a fresh heap entry; the old one is recognised as
+# stale (its due no longer matches the card) and dropped when it surfaces.
+class SRSScheduler(UserLogIndex):
+    index_filename = "srs_schedule.json"
+
+    def reset(self):
+        self.cards = {}  # question_id -> {reps, interval (days), ease, due (epoch seconds)}
+        self.heap = []   # [due, question_id], possibly stale
+
+    def apply(self, entry):
+        qid = entry["question_id"]
+        card = self.cards.get(qid, {"reps": 0, "interval": 0, "ease": INITIAL_EASE})
+        grade = CORRECT_GRADE if entry.get("was_correct") else INCORRECT_GRADE
+        card = review_card(card, grade, _log_time(entry))
+        self.cards[qid] = card
+        heapq.heappush(self.heap, [card["due"], qid])
+        if len(self.heap) > 2 * len(self.cards) + 64:
+            self._compact()
+
+    def _compact(self):
+        self.heap = [[card["due"], qid] for qid, card in self.cards.items()]
+        heapq.heapify(self.heap)
+
+    def _is_current(self, item):
+        card = self.cards.get(item[1])
+        return card is not None and card["due"] == item[0]
+
+    def to_dict(self):
+        return {"cards": self.cards, "heap": self.heap}  # a heap-ordered list stays a heap on reload
+
+    def from_dict(self, data):
+        self.cards = data["cards"]
+        self.heap = data["heap"]
+
+    # Up to k question ids that are due by `now`, most overdue first, skipping
+    # ids that keep() rejects (e.g. questions no longer in the corpus). Pops
+    # only as far as it needs and pushes the live entries back: O(k log n).
+    def due(self, k, now=None, keep=None):
+        now = time.time() if now is None else now
+        picked, popped = [], []
+        with self._lock:
+            while self.heap and self.heap[0][0] <= now and len(picked) < k:
+                item = heapq.heappop(self.heap)
+                if not self._is_current(item):
+                    continue  # superseded by a later review
+                popped.append(item)
+                if keep is None or keep(item[1]):
+                    picked.append(item[1])
+            for item in popped:
+                heapq.heappush(self.heap, item)
+        return picked
+
+    def count_due(self, now=None):
+        now = time.time() if now is None else now
+        return sum(card["due"] <= now for card in self.cards.values())
+
+
+# Up-to-date spaced-repetition schedule for a user directory (cached per process)
+def get_srs_scheduler(user_dir):
+    return _get_index(SRSScheduler, user_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the questions due for review for a user")
+    parser.add_argument("user_dir", help="e.g. user_profiles/<sub> or user")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    scheduler = get_srs_scheduler(args.user_dir)
+    print(f"🗓️ {scheduler.count_due()} of {len(scheduler.cards)} question(s) due for review")
+    for qid in scheduler.due(args.k):
+        card = scheduler.cards[qid]
+        print(f"  - {qid}: due {datetime.fromtimestamp(card['due']):%Y-%m-%d}, interval {card['interval']}d, ease {card['ease']}")
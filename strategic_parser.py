@@ -1,24 +1,61 @@
+import argparse
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from keyword_tagger import tag_texts
+from passage_chunker import chunk_paragraphs
+from snippet_store import SnippetWriter
+from worker_pool import map_in_order
 
 # Paths
 input_path = os.path.join("data", "articles.json")
-output_path = os.path.join("data", "comprehension_snippets.json")
+output_path = os.path.join("data", "comprehension_snippets.jsonl")
+SNIPPET_TOKENS = 650  # ~500 words, an MCAT-length passage
 
-# Load articles
-with open(input_path, "r", encoding="utf-8") as f:
-    articles = json.load(f)
+# Stream the objects of a top-level JSON array one at a time, reading the file in
+# chunks, so only the article being decoded (plus one chunk) is held in memory
+def iter_json_array(path, chunk_size=1 << 16):
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf:
+            return
+        if buf[0] != "[":
+            raise ValueError(f"{path} does not contain a JSON array")
+        buf = buf[1:]
+        read_size = chunk_size
+        eof = False
 
-# Keyword groups
-keywords = {
-    "contrast": ['however', 'but', 'although', 'yet', 'nevertheless', 'rather', 'in contrast', 'on the other hand', 'otherwise', 'nevertheless', 'wheras', 'while', 'different', 'unlike'],
-    "similarity": ['and', 'also', 'moreover', 'futhermore', 'like', 'same', 'similar','that is', 'in other words', 'for example', 'for instance', 'take the case of', 'including', 'such as', 'in addition', 'at the same time', 'as well as', 'equally', 'this','that', 'these', 'those', ';',':', '-'],
-    "opposition": ['not', 'never', 'none', 'on the contrary', 'as opposed to', 'versus', 'otherwise'],
-    "emphasis": ['indeed', 'in fact', 'clearly', 'must', 'above all'],
-    "moderating": ['can', 'could', 'may', 'might', 'possibly', 'probably', 'sometimes', 'on occasion', 'often', 'tends to', 'here', 'now', 'in this case', 'in some sense'],
-    "logic": ['because', 'since', 'therefore', 'as a result', 'due to']
-}
+        while True:
+            buf = buf.lstrip(" \t\r\n,")
+            if buf.startswith("]"):
+                return
+            try:
+                if not buf:
+                    raise json.JSONDecodeError("need more data", buf, 0)
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(read_size)
+                eof = not chunk
+                buf += chunk
+                read_size *= 2  # big objects: fewer re-parse attempts
+                continue
+            yield obj
+            buf = buf[end:]
+            read_size = chunk_size
+
+# Articles from a JSON array (articles.json) or one-per-line JSONL
+def iter_articles(path):
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_json_array(path)
 
 # Function: determine clause type
 def identify_clause_type(text):
@@ -26,44 +63,21 @@ def identify_clause_type(text):
         return "dependent"
     return "independent"
 
-# Function: create MCAT-like passages (500 words)
-def chunk_passage(paragraphs, max_words=500):
-    chunks = []
-    current_chunk = []
-    current_count = 0
-    for para in paragraphs:
-        word_count = len(para.split())
-        if current_count + word_count <= max_words:
-            current_chunk.append(para)
-            current_count += word_count
-        else:
-            if current_chunk:
-                chunks.append(" ".join(current_chunk))
-            current_chunk = [para]
-            current_count = word_count
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    return chunks
-
-# Output container
-comprehension_snippets = []
-
-# Process all articles
-for article in articles:
+# Chunk, sentence-split and tag one article; runs in a worker process
+def process_article(article):
     paragraphs = [p["text"] for p in article.get("paragraphs", []) if "text" in p]
-    snippets = chunk_passage(paragraphs)
+    chunks = chunk_paragraphs(paragraphs, target_tokens=SNIPPET_TOKENS, joiner=" ")
+    results = []
 
-    for snippet in snippets:
-        sentences = re.split(r'(?<=[.!?])\s+', snippet.strip())
+    for chunk in chunks:
+        snippet = chunk["text"]
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', snippet.strip()) if s]
         parsed = []
 
-        for sentence in sentences:
-            if not sentence:
-                continue
+        for sentence, found_keywords in zip(sentences, tag_texts(sentences)):
             subject = sentence.split()[0]
             verb = next((word for word in sentence.split() if word.endswith('s') or word in ['is', 'are', 'was', 'were']), "")
             clause_type = identify_clause_type(sentence)
-            found_keywords = [k for k, group in keywords.items() if any(w in sentence.lower() for w in group)]
             parsed.append({
                 "text": sentence,
                 "subject": subject,
@@ -77,18 +91,36 @@ for article in articles:
                     "flow": "How does this sentence connect to the previous one?",
                     "implied": "What is implied but not directly stated in this sentence?"
                 }
-})
+            })
 
-        comprehension_snippets.append({
+        results.append({
             "title": article.get("title"),
             "source": article.get("url"),
             "snippet": snippet,
+            "paragraph_indices": chunk["paragraph_indices"],
+            "token_count": chunk["token_count"],
             "sentences": parsed,
             "live_summary_prompt": "Summarize the passage so far in 2–3 sentences."
         })
+    return results
+
+# Stream articles through a process pool and write snippets as each article completes.
+# At most a couple of articles per worker are in flight, so memory stays bounded.
+def main(input_path=input_path, output_path=output_path, workers=None):
+    workers = workers or os.cpu_count() or 1
+    articles = 0
+    with SnippetWriter(output_path) as writer:
+        for _, snippets in map_in_order(process_article, iter_articles(input_path), max_workers=workers, executor_cls=ProcessPoolExecutor):
+            for snippet in snippets:
+                writer.write(snippet)
+            articles += 1
 
-# Save file
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(comprehension_snippets, f, indent=2)
+    print(f"✅ {len(writer.entries)} snippet(s) from {articles} article(s) saved to {output_path}")
 
-print("✅ comprehension_snippets.json saved.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turn crawled articles into sentence-level comprehension snippets")
+    parser.add_argument("--input", default=input_path, help="articles.json (JSON array) or .jsonl")
+    parser.add_argument("--output", default=output_path)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    main(args.input, args.output, args.workers)
@@ -0,0 +1,137 @@
+import argparse
+import json
+import random
+import threading
+import time
+
+STUDY_SET_SIZE = 5
+RECENT_QUESTIONS = 100       # most recent answers (profile recent_activity) not served again
+REFRESH_SECONDS = 300        # rebuild the id lists at least this often, for edits made by other processes
+MIN_WEIGHT = 0.1             # even a mastered type or difficulty still comes up now and then
+UNSEEN_WEIGHT = 0.5          # types/difficulties the student has no record on yet
+ATTEMPTS_PER_QUESTION = 20   # random draws per slot before falling back to a scan
+
+
+# Error rate from a {attempts|seen, correct} stats entry, floored at MIN_WEIGHT
+def _weakness(stats):
+    attempts = stats.get("attempts", stats.get("seen", 0))
+    if not attempts:
+        return UNSEEN_WEIGHT
+    return max(1 - stats.get("correct", 0) / attempts, MIN_WEIGHT)
+
+
+# Question ids bucketed by (question_type, difficulty), for drawing study sets
+# without touching the rest of the corpus. A set of k questions costs O(k)
+# random draws plus one weighted pick over the (few) buckets per draw.
+class StudySampler:
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.buckets = {}  # (question_type, difficulty) -> [question_id]
+        self.ids = set()   # every question id in the buckets
+        self._built_for = None  # store.generation the buckets were built at
+        self._built_at = 0
+
+    # Rebuild the buckets if the store imported or changed rows since, or they're getting old
+    def refresh(self):
+        with self._lock:
+            if self._built_for == self.store.generation and time.time() - self._built_at < REFRESH_SECONDS:
+                return
+            buckets = {}
+            for qid, qtype, difficulty in self.store.question_keys():
+                buckets.setdefault((qtype, str(difficulty)), []).append(qid)
+            self.buckets = buckets
+            self.ids = {qid for bucket in buckets.values() for qid in bucket}
+            self._built_for = self.store.generation
+            self._built_at = time.time()
+
+    # Whether a question can be served in a study set
+    def has_question(self, question_id):
+        self.refresh()
+        return question_id in self.ids
+
+    # Bucket weights for a profile: error rate on the question type times error
+    # rate at the difficulty, so weak types at weak difficulties come up most
+    def weights(self, profile):
+        type_stats = profile.get("question_stats", {})
+        difficulty_stats = profile.get("difficulty_stats", {})
+        keys = list(self.buckets)
+        weights = []
+        for qtype, difficulty in keys:
+            type_weight = _weakness(type_stats[qtype]) if qtype in type_stats else UNSEEN_WEIGHT
+            difficulty_weight = _weakness(difficulty_stats[difficulty]) if difficulty in difficulty_stats else UNSEEN_WEIGHT
+            weights.append(type_weight * difficulty_weight)
+        return keys, weights
+
+    # Draw k distinct question ids, weighted by weights(profile), skipping any in
+    # exclude (any container; a set or dict is used as is). If the draws keep
+    # landing on excluded ids (a small corpus, or a student who has seen most of
+    # it), the rest are filled by walking the buckets heaviest first, and excluded
+    # ids are only used as a last resort (never with strict_exclude=True, which
+    # returns a short set instead). Ids in taken (already in the set being built)
+    # are never returned.
+    def sample(self, profile, k=STUDY_SET_SIZE, exclude=(), taken=(), strict_exclude=False, rng=random):
+        self.refresh()
+        keys, weights = self.weights(profile)
+        if not keys:
+            return []
+        if not isinstance(exclude, (set, frozenset, dict)):
+            exclude = set(exclude)
+        picked = []
+        chosen = set(taken)
+
+        for _ in range(k * ATTEMPTS_PER_QUESTION):
+            if len(picked) == k:
+                return picked
+            bucket = self.buckets[rng.choices(keys, weights)[0]]
+            qid = bucket[rng.randrange(len(bucket))]
+            if qid not in exclude and qid not in chosen:
+                picked.append(qid)
+                chosen.add(qid)
+
+        by_weight = [self.buckets[keys[i]] for i in sorted(range(len(keys)), key=weights.__getitem__, reverse=True)]
+        for allow_excluded in (False,) if strict_exclude else (False, True):
+            for bucket in by_weight:
+                for qid in rng.sample(bucket, len(bucket)):
+                    if len(picked) == k:
+                        return picked
+                    if qid not in chosen and (allow_excluded or qid not in exclude):
+                        picked.append(qid)
+                        chosen.add(qid)
+        return picked
+
+
+# Question ids a student answered most recently, newest first
+def recent_question_ids(profile, limit=RECENT_QUESTIONS):
+    return [e["question_id"] for e in profile.get("recent_activity", [])[:limit] if "question_id" in e]
+
+
+_samplers = {}
+_samplers_lock = threading.Lock()
+
+
+# Shared sampler for a question store (one per process)
+def get_study_sampler(store):
+    with _samplers_lock:
+        if store.path not in _samplers:
+            _samplers[store.path] = StudySampler(store)
+    sampler = _samplers[store.path]
+    sampler.store = store
+    return sampler
+
+
+if __name__ == "__main__":
+    from question_store import get_question_store
+
+    parser = argparse.ArgumentParser(description="Draw a study set for a user profile")
+    parser.add_argument("profile", help="path to a user_profile.json")
+    parser.add_argument("-k", type=int, default=STUDY_SET_SIZE)
+    args = parser.parse_args()
+
+    with open(args.profile) as f:
+        profile = json.load(f)
+    sampler = get_study_sampler(get_question_store())
+    question_ids = sampler.sample(profile, args.k, exclude=recent_question_ids(profile))
+    print(f"🎲 {len(question_ids)} question(s) from {len(sampler.buckets)} type/difficulty bucket(s):")
+    for qid in question_ids:
+        print(f"  - {qid}")
@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+SESSION_BACKEND = os.getenv("STUDY_SESSION_BACKEND", "sqlite")  # sqlite | file
+SESSION_TTL = int(os.getenv("STUDY_SESSION_TTL", 6 * 60 * 60))  # seconds
+SESSION_DB_PATH = "user_profiles/study_sessions.db"
+SESSION_DIR = "user_profiles/study_sessions"
+PURGE_EVERY = 50  # writes between sweeps of expired sessions
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+# Server-side study state in a local SQLite table, one row per session
+class SQLiteSessionStore:
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS study_sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_study_sessions_expiry ON study_sessions (expires_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, session_id):
+        if not session_id:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM study_sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id, data):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO study_sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), time.time() + self.ttl)
+            )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM study_sessions WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM study_sessions WHERE expires_at <= ?", (time.time(),))
+
+
+# Same interface, one JSON file per session; expiry is the file's mtime + ttl
+class FileSessionStore:
+    def __init__(self, directory=SESSION_DIR, ttl=SESSION_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._writes = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id):
+        # session ids are hex uuids; refuse anything that could escape the directory
+        if not session_id or not session_id.isalnum():
+            return None
+        return self.directory / f"{session_id}.json"
+
+    def get(self, session_id):
+        path = self._path(session_id)
+        if path is None:
+            return None
+        try:
+            if path.stat().st_mtime + self.ttl <= time.time():
+                path.unlink(missing_ok=True)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, session_id, data):
+        path = self._path(session_id)
+        if path is None:
+            raise ValueError(f"Invalid study session id: {session_id!r}")
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, session_id):
+        path = self._path(session_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+BACKENDS = {
+    "sqlite": SQLiteSessionStore,
+    "file": FileSessionStore,
+}
+
+_store = None
+
+
+# Shared store for the configured backend (STUDY_SESSION_BACKEND)
+def get_session_store():
+    global _store
+    if _store is None:
+        if SESSION_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown STUDY_SESSION_BACKEND: {SESSION_BACKEND}")
+        _store = BACKENDS[SESSION_BACKEND]()
+    return _store
@@ -1,10 +1,7 @@
-import os
 import json
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
-from dotenv import load_dotenv
-from openai import OpenAI
+from embedding_store import embed_texts
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
@@ -13,11 +10,6 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 
-
-# Load environment
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Paths
 PASSAGE_FILE = "training-data/passages.jsonl"
 QUESTION_FILE = "training-data/questions.jsonl"
@@ -53,27 +45,14 @@ def load_dataset():
                 })
     return pd.DataFrame(records)
 
-# Step 2: Embed text using OpenAI
-def embed_text(text):
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        print("Embedding error:", e)
-        return None
-
-# Step 3: Prepare and embed dataset
+# Step 2 + 3: Embed the dataset (cached on disk, new texts fetched in batches)
 def prepare_embeddings(df):
     embeddings = []
-    for text in tqdm(df["input_text"], desc="Embedding examples"):
-        emb = embed_text(text)
-        if emb:
+    for emb in embed_texts(list(df["input_text"])):
+        if emb is not None:
             embeddings.append(emb)
         else:
-            embeddings.append([0.0] * 1536)  # fallback vector
+            embeddings.append(np.zeros(1536, dtype=np.float32))  # fallback vector
     return np.array(embeddings)
 
 # Step 4: Train classifier
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+from jsonl_tail import JsonlTail
+
+LOG_FILENAME = "user_logs.jsonl"
+APPLY_BATCH = 1000  # log lines handed to apply_batch() at a time
+
+
+# passage_id for a log line; older lines only carry the question_id ("p001_q2")
+def log_passage_id(entry):
+    return entry.get("passage_id") or entry["question_id"].split("_")[0]
+
+
+# Base for indexes derived from a user's append-only user_logs.jsonl.
+# The index remembers how many bytes of the log it has consumed, so keeping it
+# current only costs reading the lines appended since the last sync. If the log
+# is replaced or shrinks (rewritten or truncated) the index is rebuilt from scratch.
+class UserLogIndex:
+    index_filename = None
+
+    def __init__(self, user_dir):
+        self.user_dir = Path(user_dir)
+        self.log_path = self.user_dir / LOG_FILENAME
+        self.index_path = self.user_dir / self.index_filename
+        self.log_inode = None
+        self.log_offset = 0
+        self._lock = threading.Lock()
+        self.reset()
+        self._load()
+
+    # Subclasses: clear in-memory state / fold one log entry in / (de)serialize
+    def reset(self):
+        raise NotImplementedError
+
+    def apply(self, entry):
+        raise NotImplementedError
+
+    # Fold in a batch of entries; override to look things up once per batch
+    def apply_batch(self, entries):
+        for entry in entries:
+            self.apply(entry)
+
+    def to_dict(self):
+        raise NotImplementedError
+
+    def from_dict(self, data):
+        raise NotImplementedError
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.from_dict(data)
+            self.log_inode = data.get("log_inode")
+            self.log_offset = data.get("log_offset", 0)
+        except (json.JSONDecodeError, KeyError, TypeError):
+            print(f"⚠️ Rebuilding corrupt index {self.index_path}")
+            self.reset()
+            self.log_offset = 0
+
+    def save(self):
+        data = self.to_dict()
+        data["log_inode"] = self.log_inode
+        data["log_offset"] = self.log_offset
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    # Fold in any log lines appended since the last sync; returns True if anything changed
+    def sync(self):
+        with self._lock:
+            tail = JsonlTail(self.log_path, self.log_inode, self.log_offset)
+            if not tail.reset and not tail.has_new:
+                return False
+            if tail.reset:
+                self.reset()
+            batch = []
+            for entry in tail:
+                batch.append(entry)
+                if len(batch) == APPLY_BATCH:
+                    self.apply_batch(batch)
+                    batch = []
+            self.apply_batch(batch)
+            changed = tail.reset or tail.offset != tail.start
+            self.log_inode, self.log_offset = tail.inode, tail.offset
+            self.save()
+        return changed
+
+    def rebuild(self):
+        with self._lock:
+            self.reset()
+            self.log_inode, self.log_offset = None, 0
+        self.sync()
+        return self
+
+
+# Which questions a user has answered, keyed by passage_id
+class AnsweredIndex(UserLogIndex):
+    index_filename = "answered_index.json"
+
+    def reset(self):
+        self.by_passage = {}
+
+    def apply(self, entry):
+        self.by_passage.setdefault(log_passage_id(entry), set()).add(entry["question_id"])
+
+    def to_dict(self):
+        return {"passages": {pid: sorted(qids) for pid, qids in self.by_passage.items()}}
+
+    def from_dict(self, data):
+        self.by_passage = {pid: set(qids) for pid, qids in data["passages"].items()}
+
+    def answered_for_passage(self, passage_id):
+        return self.by_passage.get(passage_id, set())
+
+    def has_answered(self, question_id, passage_id):
+        return question_id in self.by_passage.get(passage_id, ())
+
+
+# Per-user accuracy rollups by topic, style, question type and difficulty.
+# Each log line is an O(1) counter update; rebuild() replays the raw log, e.g.
+# after passages get re-tagged with a new topic/style.
+class UserRollups(UserLogIndex):
+    index_filename = "rollups.json"
+    dimensions = ("topic", "style", "question_type", "difficulty")
+
+    def reset(self):
+        self.tables = {dim: {} for dim in self.dimensions}
+
+    def _bump(self, dim, key, correct):
+        stats = self.tables[dim].setdefault(str(key), {"seen": 0, "correct": 0})
+        stats["seen"] += 1
+        if correct:
+            stats["correct"] += 1
+
+    # Topic and style come from the passage; a batch's passages are fetched in one query
+    def apply_batch(self, entries):
+        from question_store import get_question_store
+
+        if not entries:
+            return
+        passages = get_question_store().get_passages({log_passage_id(e) for e in entries})
+        for entry in entries:
+            self.apply(entry, passages)
+
+    def apply(self, entry, passages=None):
+        if passages is None:
+            self.apply_batch([entry])
+            return
+        correct = entry.get("was_correct", False)
+        self._bump("question_type", entry.get("question_type", "unknown"), correct)
+        self._bump("difficulty", entry.get("difficulty", "unknown"), correct)
+
+        passage = passages.get(log_passage_id(entry))
+        if passage:
+            self._bump("topic", passage.get("topic", "unknown"), correct)
+            self._bump("style", passage.get("style", "unknown"), correct)
+
+    def to_dict(self):
+        return {"tables": self.tables}
+
+    def from_dict(self, data):
+        self.reset()
+        self.tables.update(data["tables"])
+
+    @property
+    def topic(self):
+        return self.tables["topic"]
+
+    @property
+    def style(self):
+        return self.tables["style"]
+
+    @property
+    def question_type(self):
+        return self.tables["question_type"]
+
+    @property
+    def difficulty(self):
+        return self.tables["difficulty"]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(cls, user_dir):
+    key = (cls, str(user_dir))
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(key, cls(user_dir))
+    index.sync()
+    return index
+
+
+# Up-to-date answered-question index for a user directory (cached per process)
+def get_answered_index(user_dir):
+    return _get_index(AnsweredIndex, user_dir)
+
+
+# Up-to-date topic/style/type/difficulty rollups for a user directory (cached per process)
+def get_user_rollups(user_dir):
+    return _get_index(UserRollups, user_dir)
+
+
+# Called after appending to a user's log so the derived indexes stay current
+def sync_user_indexes(user_dir):
+    from srs_scheduler import get_srs_scheduler
+
+    get_answered_index(user_dir)
+    get_user_rollups(user_dir)
+    get_srs_scheduler(user_dir)
+
+
+# Rebuild every derived index for the given user directories from their raw logs
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild per-user indexes from user_logs.jsonl")
+    parser.add_argument("user_dirs", nargs="+", help="e.g. user_profiles/<sub> or user")
+    args = parser.parse_args()
+
+    from srs_scheduler import SRSScheduler
+
+    for user_dir in args.user_dirs:
+        for cls in (AnsweredIndex, UserRollups, SRSScheduler):
+            cls(user_dir).rebuild()
+        print(f"✅ Rebuilt indexes for {user_dir}")
@@ -0,0 +1,20 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Run fn over items concurrently and yield (item, result) pairs in input order.
+# At most `window` calls are in flight or buffered at once (default: 2 per worker),
+# so memory stays bounded even for long or lazy inputs. Exceptions raised by fn
+# surface when their item's turn comes up.
+def map_in_order(fn, items, max_workers=4, executor_cls=ThreadPoolExecutor, window=None):
+    window = window or max_workers * 2
+    pending = deque()
+    with executor_cls(max_workers=max_workers) as executor:
+        for item in items:
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= window:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        while pending:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()